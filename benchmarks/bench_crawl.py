@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Crawler throughput benchmark against the local fake 知识星球 API
+
+Starts benchmarks/fake_zsxq_server.py in-process, points the crawler at it and
+reports topics/sec for a full first-time crawl (home + digest) of every group,
+with the sync crawler (groups one after another) and the async crawler
+(groups gathered concurrently).
+
+Usage:
+    python benchmarks/bench_crawl.py --groups 5 --topics 400 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_zsxq_server import FakeZsxqData, FakeZsxqServer  # noqa: E402
+
+
+def configure_env(base_url: str, group_ids, workdir: str):
+    """Point the crawler settings at the fake server; must run before importing config"""
+    os.environ.update({
+        'ZSXQ_API_BASE_URL': base_url,
+        'ZSXQ_COOKIE': 'benchmark',
+        'ZSXQ_GROUPS': json.dumps({group_id: {'is_crawl_home': True, 'thread_ids': {}} for group_id in group_ids}),
+        'TOPIC_CACHE_FILE': os.path.join(workdir, 'topic_cache.db'),
+        'QUOTA_FILE': os.path.join(workdir, 'api_quota.db'),
+        'TEMP_DIR': os.path.join(workdir, 'downloads'),
+    })
+    # Measure the crawler rather than the politeness limits, unless asked otherwise
+    for key, value in (('RATE_LIMIT_INITIAL_RATE', '1000'), ('RATE_LIMIT_MAX_RATE', '1000'), ('RATE_LIMIT_BURST', '100'),
+                       ('QUOTA_DAILY_LIMIT', '0'), ('QUOTA_HOURLY_LIMIT', '0')):
+        os.environ.setdefault(key, value)
+
+
+def quiet_loggers():
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('src.'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def run_sync(group_ids) -> int:
+    from src.crawlers.zsxq_crawler import ZsxqCrawler
+    total = 0
+    for group_id in group_ids:
+        crawler = ZsxqCrawler(group_id)
+        home_topics, _ = crawler.crawl_home_topics()
+        digest_topics, _ = crawler.get_digest_topics()
+        total += len(home_topics) + len(digest_topics)
+    return total
+
+
+async def run_async(group_ids) -> int:
+    from src.crawlers.async_zsxq_crawler import AsyncZsxqCrawler
+    from src.utils.http_client import HttpClient
+
+    async def crawl(group_id):
+        crawler = AsyncZsxqCrawler(group_id)
+        home_topics, _ = await crawler.crawl_home_topics()
+        digest_topics, _ = await crawler.get_digest_topics()
+        return len(home_topics) + len(digest_topics)
+
+    try:
+        return sum(await asyncio.gather(*(crawl(group_id) for group_id in group_ids)))
+    finally:
+        await HttpClient.close_async_session()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler throughput benchmark")
+    parser.add_argument('--groups', type=int, default=3, help="number of synthetic groups")
+    parser.add_argument('--topics', type=int, default=200, help="topics per group")
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--verbose', action='store_true', help="keep crawler INFO logging")
+    args = parser.parse_args()
+
+    group_ids = [str(1001 + i) for i in range(args.groups)]
+    server = FakeZsxqServer(FakeZsxqData(group_ids, args.topics), latency_ms=args.latency_ms,
+                            error_rate=args.error_rate, throttle_rate=args.throttle_rate).start()
+    workdir = tempfile.mkdtemp(prefix='zsxq_bench_')
+    # Keep logs, state and caches out of the working tree
+    os.chdir(workdir)
+    configure_env(server.base_url, group_ids, workdir)
+
+    # Import both crawlers up front so quiet_loggers sees their loggers
+    from src.crawlers.async_zsxq_crawler import AsyncZsxqCrawler  # noqa: F401
+    from src.managers.group_manager import GroupManager
+    from src.utils.topic_cache import TopicCache
+    GroupManager().initialize_groups()
+    if not args.verbose:
+        quiet_loggers()
+
+    runners = {'sync': lambda: run_sync(group_ids), 'async': lambda: asyncio.run(run_async(group_ids))}
+    modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+    print(f"{args.groups} groups x {args.topics} topics, latency {args.latency_ms}ms, "
+          f"error rate {args.error_rate}, throttle rate {args.throttle_rate}")
+    for mode in modes:
+        TopicCache().clear()
+        requests_before = server.request_count
+        start = time.perf_counter()
+        topics = runners[mode]()
+        elapsed = time.perf_counter() - start
+        requests = server.request_count - requests_before
+        print(f"{mode:>5}: {topics} topics, {requests} requests in {elapsed:.2f}s -> {topics / elapsed:.1f} topics/s")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Topic page decoding benchmark
+
+Compares turning a raw topic listing response into Topic models with
+`json.loads` + `Topic.from_dict` (the original path) against the typed
+msgspec path in src/crawlers/decoder.py, both from dicts (what the crawler
+does, since it keeps the raw dicts for the cache and journal) and straight
+from response bytes.
+
+Usage:
+    python benchmarks/bench_decode.py --topics 1000 --rounds 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_zsxq_server import FakeZsxqData  # noqa: E402
+
+
+def best_of(rounds: int, func) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topic page decoding benchmark")
+    parser.add_argument('--topics', type=int, default=1000, help="topics in the decoded page")
+    parser.add_argument('--rounds', type=int, default=20, help="runs per path, the fastest is reported")
+    args = parser.parse_args()
+
+    from src.crawlers.decoder import decode_json, decode_topics, topic_from_dict
+    from src.crawlers.models import Topic
+
+    data = FakeZsxqData(['1001'], args.topics)
+    topics = data.home_page('1001', args.topics, None)
+    body = json.dumps({'succeeded': True, 'resp_data': {'topics': topics}}, ensure_ascii=False).encode('utf-8')
+
+    paths = {
+        'json.loads + from_dict': lambda: [Topic.from_dict(t) for t in json.loads(body)['resp_data']['topics']],
+        'msgspec dicts + typed convert': lambda: [topic_from_dict(t) for t in decode_json(body)['resp_data']['topics']],
+        'msgspec typed from bytes': lambda: decode_topics(body),
+    }
+    reference = paths['json.loads + from_dict']()
+    print(f"{len(topics)} topics, {len(body) / 1024:.0f} KiB page, best of {args.rounds}")
+    baseline = None
+    for name, func in paths.items():
+        if func() != reference:
+            raise SystemExit(f"{name} decoded different topics than from_dict")
+        elapsed = best_of(args.rounds, func)
+        baseline = baseline or elapsed
+        print(f"{name:>30}: {elapsed * 1000:8.2f}ms  {len(topics) / elapsed:10.0f} topics/s  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
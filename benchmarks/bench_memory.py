@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Topic model memory benchmark
+
+Decodes a synthetic topic listing with `Topic.from_dict` and with the typed
+decoder, drops the raw payload and reports the memory retained per Topic
+tree as measured by tracemalloc. Each path is measured twice: against a
+baseline loaded from the same models.py with plain dataclasses and no string
+interning, as the models were before they were slotted, and against the
+current models.
+
+Usage:
+    python benchmarks/bench_memory.py --topics 20000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_zsxq_server import FakeZsxqData  # noqa: E402
+
+
+def load_module(name: str, source: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    exec(compile(source, name, 'exec'), module.__dict__)
+    return module
+
+
+def patched(source: str, old: str, new: str) -> str:
+    if old not in source:
+        raise SystemExit(f"Cannot build the baseline models, {old!r} not found")
+    return source.replace(old, new)
+
+
+def load_baseline():
+    """Load models.py and decoder.py with the models unslotted and not interning strings"""
+    with open(os.path.join(ROOT, 'src', 'crawlers', 'models.py'), encoding='utf-8') as f:
+        models_source = f.read()
+    with open(os.path.join(ROOT, 'src', 'crawlers', 'decoder.py'), encoding='utf-8') as f:
+        decoder_source = f.read()
+    models_source = patched(models_source, '@dataclass(slots=True)', '@dataclass')
+    models_source = patched(models_source, 'return sys.intern(value) if type(value) is str else value', 'return value')
+    decoder_source = patched(decoder_source, 'from .models import', 'from baseline_models import')
+    models = load_module('baseline_models', models_source)
+    decoder = load_module('baseline_decoder', decoder_source)
+    return models, decoder
+
+
+def retained_bytes(build) -> int:
+    """Bytes still allocated after `build()` returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topic model memory benchmark")
+    parser.add_argument('--topics', type=int, default=20000, help="topics to keep in memory")
+    args = parser.parse_args()
+
+    from src.crawlers.decoder import decode_topics
+    from src.crawlers.models import Topic
+
+    data = FakeZsxqData(['1001'], args.topics)
+    body = json.dumps({'succeeded': True, 'resp_data': {'topics': data.home_page('1001', args.topics, None)}},
+                      ensure_ascii=False).encode('utf-8')
+    # Parse timestamps once so the parser cache is not counted against the models
+    decode_topics(body)
+
+    baseline_models, baseline_decoder = load_baseline()
+    baseline_decoder.decode_topics(body)
+    paths = {
+        'Topic.from_dict': (
+            lambda: [baseline_models.Topic.from_dict(t) for t in json.loads(body)['resp_data']['topics']],
+            lambda: [Topic.from_dict(t) for t in json.loads(body)['resp_data']['topics']],
+        ),
+        'decode_topics': (
+            lambda: baseline_decoder.decode_topics(body),
+            lambda: decode_topics(body),
+        ),
+    }
+    print(f"{args.topics} topics, bytes retained per topic")
+    print(f"{'':>16}  {'baseline':>10}  {'current':>10}  {'saved':>6}")
+    for name, (build_baseline, build) in paths.items():
+        before = retained_bytes(build_baseline) / args.topics
+        after = retained_bytes(build) / args.topics
+        print(f"{name:>16}: {before:10.0f}  {after:10.0f}  {1 - after / before:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
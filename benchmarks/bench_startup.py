@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark
+
+Launches `crawl.py` and `run_scheduler.py` as fresh processes against the
+fake API, each in an empty working directory so no cache is warm, and
+reports the time from process start to the first API request the server
+receives, along with the time to just import each entry point. The
+process is killed once the first request arrives.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_zsxq_server import FakeZsxqData, FakeZsxqServer  # noqa: E402
+
+ENTRY_POINTS = ['crawl.py', 'run_scheduler.py']
+
+
+def child_env(base_url: str, group_ids) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'ZSXQ_API_BASE_URL': base_url,
+        'ZSXQ_COOKIE': 'benchmark',
+        'ZSXQ_GROUPS': json.dumps({group_id: {'is_crawl_home': True, 'thread_ids': {}} for group_id in group_ids}),
+        'TELEGRAM_BOT_TOKEN': '0:benchmark',
+        'TELEGRAM_CHAT_ID': '0',
+        'QUOTA_DAILY_LIMIT': '0',
+        'QUOTA_HOURLY_LIMIT': '0',
+    })
+    return env
+
+
+def time_to_first_request(server: FakeZsxqServer, script: str, env: dict, timeout: float) -> float:
+    """Seconds from spawning the script until the fake API sees its first request"""
+    server.first_request_at = None
+    with tempfile.TemporaryDirectory(prefix='zsxq_startup_') as workdir:
+        start = time.monotonic()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, script)], cwd=workdir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while server.first_request_at is None:
+                if process.poll() is not None:
+                    raise SystemExit(f"{script} exited with {process.returncode} before making a request")
+                if time.monotonic() - start > timeout:
+                    raise SystemExit(f"{script} made no request within {timeout}s")
+                time.sleep(0.001)
+            return server.first_request_at - start
+        finally:
+            process.kill()
+            process.wait()
+
+
+def time_to_import(module: str, env: dict) -> float:
+    """Seconds for a fresh interpreter to import the entry point module and exit"""
+    with tempfile.TemporaryDirectory(prefix='zsxq_startup_') as workdir:
+        start = time.monotonic()
+        subprocess.run([sys.executable, '-c', f"import sys; sys.path.insert(0, {ROOT!r}); import {module}"],
+                       cwd=workdir, env=env, check=True)
+        return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument('--runs', type=int, default=5, help="launches per entry point, the median is reported")
+    parser.add_argument('--groups', type=int, default=3, help="number of configured groups")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for the first request")
+    args = parser.parse_args()
+
+    group_ids = [str(1001 + i) for i in range(args.groups)]
+    server = FakeZsxqServer(FakeZsxqData(group_ids, 20)).start()
+    env = child_env(server.base_url, group_ids)
+
+    print(f"median of {args.runs} cold starts, {args.groups} groups")
+    for script in ENTRY_POINTS:
+        imports = [time_to_import(script[:-3], env) for _ in range(args.runs)]
+        first_requests = [time_to_first_request(server, script, env, args.timeout) for _ in range(args.runs)]
+        print(f"{script:>17}: import {statistics.median(imports) * 1000:6.0f}ms  "
+              f"first request {statistics.median(first_requests) * 1000:6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Timestamp parsing micro-benchmark
+
+Compares src/utils/time_parser.parse_zsxq_time, cold and with its cache
+warm, against the parsers the models used before: pandas.to_datetime
+(skipped when pandas is not installed) and the strptime fallback chain.
+
+Usage:
+    python benchmarks/bench_time_parser.py --count 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.utils.time_parser import _parse, parse_zsxq_time  # noqa: E402
+
+
+def strptime_chain(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z')
+    except ValueError:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def timed(values, parse) -> float:
+    start = time.perf_counter()
+    for value in values:
+        parse(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timestamp parsing micro-benchmark")
+    parser.add_argument('--count', type=int, default=20000, help="distinct timestamps to parse")
+    args = parser.parse_args()
+
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    values = [(base - timedelta(seconds=37 * i, milliseconds=i % 1000)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
+              for i in range(args.count)]
+
+    parsers = {'strptime chain': strptime_chain}
+    try:
+        import pandas as pd
+        parsers['pandas.to_datetime'] = pd.to_datetime
+    except ImportError:
+        print("pandas not installed, skipping pandas.to_datetime")
+    for name, parse in parsers.items():
+        if parse(values[0]) != parse_zsxq_time(values[0]):
+            raise SystemExit(f"{name} parsed {values[0]} differently")
+
+    _parse.cache_clear()
+    results = {name: timed(values, parse) for name, parse in parsers.items()}
+    results['parse_zsxq_time (cold)'] = timed(values, parse_zsxq_time)
+    results['parse_zsxq_time (cached)'] = timed(values, parse_zsxq_time)
+
+    print(f"{args.count} timestamps")
+    for name, elapsed in results.items():
+        print(f"{name:>26}: {elapsed * 1000:8.1f}ms  {elapsed / args.count * 1e6:6.2f}us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the 知识星球 API used by ZsxqCrawler and GroupManager
+
+Serves synthetic groups and topics with configurable latency, error and
+throttle rates, so crawler throughput can be measured without a live account.
+Point the crawler at it with ZSXQ_API_BASE_URL=http://127.0.0.1:<port>/v2.
+
+Endpoints:
+    GET /v2/groups/{id}                    group info
+    GET /v2/groups/{id}/topics             home topics, newest first, `end_time` pagination
+    GET /v2/groups/{id}/topics/digests     digest topics, `index` pagination
+    GET /v2/topics/{id}/info               topic detail
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TZ = timezone(timedelta(hours=8))
+BASE_TIME = datetime(2024, 6, 1, 12, 0, 0, tzinfo=TZ)
+
+
+def format_time(dt: datetime) -> str:
+    """Format a datetime the way the zsxq API does, e.g. 2024-06-01T12:00:00.000+0800"""
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}" + dt.strftime('%z')
+
+
+def parse_time(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z')
+
+
+def image_size(url: str, width: int, height: int, size: Optional[int] = None) -> Dict[str, Any]:
+    data = {'url': url, 'width': width, 'height': height}
+    if size is not None:
+        data['size'] = size
+    return data
+
+
+def image(image_id: int) -> Dict[str, Any]:
+    url = f"https://images.zsxq.example/{image_id}"
+    return {
+        'image_id': image_id,
+        'type': 'jpg',
+        'thumbnail': image_size(f"{url}/thumbnail", 200, 150),
+        'large': image_size(f"{url}/large", 800, 600),
+        'original': image_size(f"{url}/original", 1600, 1200, 245760)
+    }
+
+
+class FakeZsxqData:
+    """Deterministic synthetic groups and topics"""
+
+    def __init__(self, group_ids: List[str], topics_per_group: int, digest_every: int = 5, seed: int = 0):
+        self.group_ids = [str(group_id) for group_id in group_ids]
+        self.topics_per_group = topics_per_group
+        self.digest_every = digest_every
+        self.seed = seed
+
+    def _topic_ref(self, group_id: str, n: int) -> Tuple[int, datetime]:
+        """Topic ID and create time of the n-th newest topic of a group"""
+        group_index = self.group_ids.index(group_id)
+        topic_id = (group_index + 1) * 10 ** 9 + self.topics_per_group - n
+        create_time = BASE_TIME - timedelta(minutes=37 * n, milliseconds=n % 1000)
+        return topic_id, create_time
+
+    def _locate(self, topic_id: int) -> Optional[Tuple[str, int]]:
+        group_index, remainder = divmod(topic_id, 10 ** 9)
+        n = self.topics_per_group - remainder
+        if 1 <= group_index <= len(self.group_ids) and 0 <= n < self.topics_per_group:
+            return self.group_ids[group_index - 1], n
+        return None
+
+    def user(self, user_id: int) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'name': f"用户{user_id % 50}",
+            'avatar_url': f"https://images.zsxq.example/avatar/{user_id % 50}",
+            'location': '上海'
+        }
+
+    def topic(self, group_id: str, n: int) -> Dict[str, Any]:
+        topic_id, create_time = self._topic_ref(group_id, n)
+        rng = random.Random(f"{self.seed}-{topic_id}")
+        text = '。'.join(f"这是第{n}条帖子的第{i}段内容" for i in range(rng.randint(3, 30)))
+        return {
+            'topic_id': topic_id,
+            'group': {'group_id': int(group_id), 'name': f"测试星球{group_id}", 'type': 'pay', 'background_url': ''},
+            'type': 'talk',
+            'talk': {
+                'owner': self.user(rng.randint(1, 10 ** 6)),
+                'text': f'<e type="hashtag" hid="1" title="%23测试%23" />{text}',
+                'images': [image(topic_id * 10 + i) for i in range(rng.randint(0, 3))],
+                'files': [{
+                    'file_id': topic_id,
+                    'name': f"附件{n}.pdf",
+                    'hash': f"{topic_id:x}",
+                    'size': rng.randint(10 ** 4, 10 ** 7),
+                    'download_count': rng.randint(0, 100),
+                    'create_time': format_time(create_time)
+                }] if rng.random() < 0.2 else []
+            },
+            'latest_likes': [
+                {'create_time': format_time(create_time + timedelta(minutes=i + 1)), 'owner': self.user(rng.randint(1, 10 ** 6))}
+                for i in range(rng.randint(0, 5))
+            ],
+            'likes_count': rng.randint(0, 50),
+            'tourist_likes_count': 0,
+            'likes_detail': {'emojis': [{'emoji_key': '[赞]', 'likes_count': rng.randint(1, 20)}]},
+            'rewards_count': 0,
+            'comments_count': rng.randint(0, 20),
+            'reading_count': rng.randint(0, 1000),
+            'readers_count': rng.randint(0, 500),
+            'digested': self.is_digested(n),
+            'sticky': False,
+            'user_specific': {'liked': False, 'liked_emojis': [], 'subscribed': False},
+            'title': f"测试帖子{n}",
+            'create_time': format_time(create_time)
+        }
+
+    def is_digested(self, n: int) -> bool:
+        return n % self.digest_every == 0
+
+    def home_page(self, group_id: str, count: int, end_time: Optional[str]) -> List[Dict[str, Any]]:
+        start = 0
+        if end_time:
+            # The first topic strictly older than end_time
+            cutoff = parse_time(end_time)
+            while start < self.topics_per_group and self._topic_ref(group_id, start)[1] >= cutoff:
+                start += 1
+        return [self.topic(group_id, n) for n in range(start, min(start + count, self.topics_per_group))]
+
+    def digest_page(self, group_id: str, count: int, index: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        digested = range(0, self.topics_per_group, self.digest_every)
+        page = digested[index:index + count]
+        topics = []
+        for n in page:
+            topic = self.topic(group_id, n)
+            topics.append({key: topic[key] for key in ('topic_id', 'title', 'create_time', 'likes_count')} | {'owner': topic['talk']['owner']})
+        next_index = index + count if index + count < len(digested) else None
+        return topics, next_index
+
+    def topic_detail(self, topic_id: int) -> Optional[Dict[str, Any]]:
+        located = self._locate(topic_id)
+        return self.topic(*located) if located else None
+
+    def group(self, group_id: str) -> Dict[str, Any]:
+        now = format_time(BASE_TIME)
+        return {
+            'group_id': int(group_id),
+            'number': int(group_id) % 100000,
+            'name': f"测试星球{group_id}",
+            'description': '本地压测用的星球',
+            'create_time': '2020-01-01T00:00:00.000+0800',
+            'update_time': now,
+            'privilege_user_last_topic_create_time': now,
+            'latest_topic_create_time': now,
+            'alive_time': now,
+            'background_url': '',
+            'type': 'pay',
+            'risk_level': 'normal',
+            'category': {'category_id': 1, 'title': '测试'},
+            'owner': {'user_id': 1, 'name': '星主', 'avatar_url': '', 'description': ''},
+            'admin_ids': [],
+            'guest_ids': [],
+            'partner_ids': [],
+            'promos': [image(int(group_id))],
+            'policies': {
+                'need_examine': False,
+                'allow_member_renew': True,
+                'payment': {'amount': 19900, 'duration': '1Y', 'mode': 'pay', 'end_time': '2099-01-01T00:00:00.000+0800',
+                            'daily_price': {'enabled': False}, 'marked_price': {}},
+                'renewal': {'discounted_percentage': 100, 'advance_discounted_percentage': 100, 'grace_discounted_percentage': 100},
+                'allow_enable_distribution': False,
+                'distribution': {'privileged_user_enabled': False, 'enabled': False, 'percentage': 0, 'commission_percentage': 0},
+                'new_members_limit_days': 0,
+                'collect_member_profiles': False,
+                'mute_mode': {'enabled': False, 'repeat_days': [], 'begin_time': '00:00', 'end_time': '00:00'},
+                'enable_scoreboard': False,
+                'free_questions_limit_count': 0,
+                'question_fee': {'min_amount': 0, 'amount_options': []},
+                'enable_member_number': True,
+                'members_visibility': 'all',
+                'allow_sharing': True,
+                'allow_private_chat': True,
+                'allow_search': True,
+                'allow_preview': True,
+                'allow_join': True,
+                'allow_anonymous_question': False,
+                'silence_new_member': False,
+                'enable_watermark': False,
+                'parse_book_title': False,
+                'allow_copy': True,
+                'allow_download': True,
+                'enable_iap': False,
+                'enable_iap_join_group': False,
+                'enable_iap_renew_group': False,
+                'allow_recommendation': False,
+                'allow_screen_capture_recording': True,
+                'hide_member_description': False,
+                'hide_member_group_and_account': False,
+                'auto_renewal': {'enabled': False, 'yearly_package_price': 0, 'quarterly_package_price': 0}
+            },
+            'privileges': {'access_group_data': 'all', 'access_incomes_data': 'all', 'access_weekly_reports': 'all',
+                           'create_topic': 'all', 'create_comment': 'all'},
+            'statistics': {'topics': {'topics_count': self.topics_per_group}, 'files': {'count': 0}, 'members': {'count': 1}},
+            'user_specific': {
+                'paid': True,
+                'membership': {'begin_time': '2024-01-01T00:00:00.000+0800', 'end_time': '2099-01-01T00:00:00.000+0800',
+                               'need_renew': False, 'can_renew': True, 'pay_time': '2024-01-01T00:00:00.000+0800'},
+                'validity': {'begin_time': '2024-01-01T00:00:00.000+0800', 'end_time': '2099-01-01T00:00:00.000+0800'},
+                'join_time': '2024-01-01T00:00:00.000+0800',
+                'rewarded_owner': False,
+                'enable_footprint': False,
+                'last_active_time': now,
+                'followed_owner': False
+            }
+        }
+
+
+class FakeZsxqServer:
+    """Threaded HTTP server wrapping FakeZsxqData"""
+
+    def __init__(self, data: FakeZsxqData, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0):
+        self.data = data
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.request_count = 0
+        self.first_request_at: Optional[float] = None  # time.monotonic() of the first request
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client went away, e.g. a benchmark killed it after its first request
+
+            def do_GET(self):
+                with server._count_lock:
+                    server.request_count += 1
+                    if server.first_request_at is None:
+                        server.first_request_at = time.monotonic()
+                if server.latency_ms:
+                    time.sleep(random.uniform(0.5, 1.5) * server.latency_ms / 1000)
+                if random.random() < server.error_rate:
+                    return self._send(500, {'succeeded': False, 'code': 500})
+                if random.random() < server.throttle_rate:
+                    return self._send(429, {'succeeded': False, 'code': 1059})
+                status, body = server.route(self.path)
+                self._send(status, body)
+
+        return Handler
+
+    def route(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        parsed = urlparse(path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        count = int(query.get('count', 20))
+
+        match = re.fullmatch(r'/v2/groups/(\d+)/topics/digests', parsed.path)
+        if match and match.group(1) in self.data.group_ids:
+            topics, next_index = self.data.digest_page(match.group(1), count, int(query.get('index') or 0))
+            resp_data = {'topics': topics}
+            if next_index is not None:
+                resp_data['index'] = str(next_index)
+            return 200, {'succeeded': True, 'resp_data': resp_data}
+
+        match = re.fullmatch(r'/v2/groups/(\d+)/topics', parsed.path)
+        if match and match.group(1) in self.data.group_ids:
+            topics = self.data.home_page(match.group(1), count, query.get('end_time'))
+            return 200, {'succeeded': True, 'resp_data': {'topics': topics}}
+
+        match = re.fullmatch(r'/v2/groups/(\d+)', parsed.path)
+        if match and match.group(1) in self.data.group_ids:
+            return 200, {'succeeded': True, 'resp_data': {'group': self.data.group(match.group(1))}}
+
+        match = re.fullmatch(r'/v2/topics/(\d+)/info', parsed.path)
+        if match:
+            topic = self.data.topic_detail(int(match.group(1)))
+            if topic:
+                return 200, {'succeeded': True, 'resp_data': {'topic': topic}}
+
+        return 404, {'succeeded': False, 'code': 404, 'error': 'not found'}
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self) -> 'FakeZsxqServer':
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake 知识星球 API server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--groups', default='1001', help="comma separated group IDs")
+    parser.add_argument('--topics', type=int, default=500, help="topics per group")
+    parser.add_argument('--digest-every', type=int, default=5, help="every n-th topic is a digest")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="mean response latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of requests answered with HTTP 429")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    data = FakeZsxqData(args.groups.split(','), args.topics, args.digest_every, args.seed)
+    server = FakeZsxqServer(data, args.host, args.port, args.latency_ms, args.error_rate, args.throttle_rate)
+    print(f"Serving fake 知识星球 API at {server.base_url} (groups: {args.groups}, {args.topics} topics each)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Configuration settings for the 知识星球 crawler.
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Any
+from src.utils.account_config import AccountConfigManager
 from src.utils.group_config import GroupConfigManager
 
 def get_env_or_default(key: str, default: str = None) -> Optional[str]:
@@ -12,18 +13,67 @@ def get_env_or_default(key: str, default: str = None) -> Optional[str]:
 
 # 知识星球 settings - from environment variables
 COOKIE = get_env_or_default('ZSXQ_COOKIE')
+ZSXQ_API_BASE_URL = get_env_or_default('ZSXQ_API_BASE_URL', 'https://api.zsxq.com/v2')  # Override to point at a local fake API
 
 # Group configurations
 groups_config = get_env_or_default('ZSXQ_GROUPS', '{}')  # Default to empty JSON object
 # Initialize group config manager
 GROUP_CONFIG_MANAGER = GroupConfigManager(groups_config)
 
+# Account configurations, ZSXQ_COOKIE becomes the default account of groups not listed here
+accounts_config = get_env_or_default('ZSXQ_ACCOUNTS', '{}')
+ACCOUNT_CONFIG_MANAGER = AccountConfigManager(accounts_config, COOKIE)
+
 # Crawling settings
 MAX_TOPICS_PER_FETCH = 20
+DETAIL_FETCH_CONCURRENCY = int(get_env_or_default('DETAIL_FETCH_CONCURRENCY', '5'))  # Max in-flight topic detail requests per digest page
+PROBE_TOPICS_COUNT = int(get_env_or_default('PROBE_TOPICS_COUNT', '3'))  # Page size of the change-detection probe, extra entries step over pinned topics
 CRAWL_INTERVAL_MINUTES = int(get_env_or_default('CRAWL_INTERVAL_MINUTES', '60'))  # Default to 60 minutes
+CRAWL_MIN_INTERVAL_MINUTES = float(get_env_or_default('CRAWL_MIN_INTERVAL_MINUTES', '5'))  # Polling interval bounds of a group
+CRAWL_MAX_INTERVAL_MINUTES = float(get_env_or_default('CRAWL_MAX_INTERVAL_MINUTES', '360'))
+CRAWL_RATE_SMOOTHING = float(get_env_or_default('CRAWL_RATE_SMOOTHING', '0.3'))  # Weight of the latest poll in a group's posting rate
+
+# Telegram delivery pipeline
+DELIVERY_WORKERS = int(get_env_or_default('DELIVERY_WORKERS', '2'))  # Delivery shards, groups map to one shard each
+DELIVERY_QUEUE_SIZE = int(get_env_or_default('DELIVERY_QUEUE_SIZE', '100'))  # Crawled topics waiting to be sent before crawlers block
+DELIVERY_INTERVAL_SECONDS = float(get_env_or_default('DELIVERY_INTERVAL_SECONDS', '2'))  # Pause of a delivery worker after each send
+DELIVERY_MAX_ATTEMPTS = int(get_env_or_default('DELIVERY_MAX_ATTEMPTS', '5'))  # Send attempts per topic, across restarts
+DELIVERY_RETRY_BACKOFF_SECONDS = float(get_env_or_default('DELIVERY_RETRY_BACKOFF_SECONDS', '5'))  # Doubles after each failed attempt
+DELIVERY_OUTBOX_FILE = get_env_or_default('DELIVERY_OUTBOX_FILE', 'delivery_outbox.db')
+DELIVERY_OUTBOX_RETENTION_DAYS = float(get_env_or_default('DELIVERY_OUTBOX_RETENTION_DAYS', '7'))  # Sent topics kept for deduplication
+CRAWL_GROUP_CONCURRENCY = int(get_env_or_default('CRAWL_GROUP_CONCURRENCY', '4'))  # Max groups processed at the same time
+CRAWL_ACCOUNT_CONCURRENCY = int(get_env_or_default('CRAWL_ACCOUNT_CONCURRENCY', '2'))  # Max of those groups crawled by the same account
+CRAWL_GROUP_TIMEOUT_MINUTES = float(get_env_or_default('CRAWL_GROUP_TIMEOUT_MINUTES', '30'))  # Per-group time budget of a crawl job
+CRAWL_LEASE_FILE = get_env_or_default('CRAWL_LEASE_FILE', '')  # Shared SQLite lease store of scheduler replicas, empty to own every group
+CRAWL_LEASE_TTL_SECONDS = float(get_env_or_default('CRAWL_LEASE_TTL_SECONDS', '120'))  # A dead replica's groups are taken over after this
+CRAWL_INSTANCE_ID = get_env_or_default('CRAWL_INSTANCE_ID', '')  # Unique name of this replica, defaults to hostname and PID
 TEMP_DIR = Path(get_env_or_default('TEMP_DIR',  '/tmp/zsxq_downloads'))
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# HTTP settings
+HTTP_POOL_SIZE = int(get_env_or_default('HTTP_POOL_SIZE', '20'))  # Max pooled connections per host
+HTTP_CONNECT_TIMEOUT = float(get_env_or_default('HTTP_CONNECT_TIMEOUT', '5'))  # Seconds
+HTTP_READ_TIMEOUT = float(get_env_or_default('HTTP_READ_TIMEOUT', '30'))  # Seconds
+HTTP_MAX_RETRIES = int(get_env_or_default('HTTP_MAX_RETRIES', '3'))  # Retries on 5xx and connection errors
+HTTP_BACKOFF_BASE_SECONDS = float(get_env_or_default('HTTP_BACKOFF_BASE_SECONDS', '0.5'))
+HTTP_BACKOFF_MAX_SECONDS = float(get_env_or_default('HTTP_BACKOFF_MAX_SECONDS', '10'))
+
+# Rate limiting settings (shared by all crawlers using the same account)
+RATE_LIMIT_INITIAL_RATE = float(get_env_or_default('RATE_LIMIT_INITIAL_RATE', '1'))  # Requests per second
+RATE_LIMIT_MIN_RATE = float(get_env_or_default('RATE_LIMIT_MIN_RATE', '0.2'))
+RATE_LIMIT_MAX_RATE = float(get_env_or_default('RATE_LIMIT_MAX_RATE', '5'))
+RATE_LIMIT_BURST = int(get_env_or_default('RATE_LIMIT_BURST', '3'))
+RATE_LIMIT_MAX_BACKOFF_SECONDS = float(get_env_or_default('RATE_LIMIT_MAX_BACKOFF_SECONDS', '120'))
+RATE_LIMIT_MAX_RETRIES = int(get_env_or_default('RATE_LIMIT_MAX_RETRIES', '3'))  # Retries of a throttled request
+ZSXQ_THROTTLE_CODES = {int(code) for code in get_env_or_default('ZSXQ_THROTTLE_CODES', '1059').split(',') if code.strip()}
+
+# API call budget per account, 0 disables a limit
+QUOTA_FILE = get_env_or_default('QUOTA_FILE', 'api_quota.db')  # Shared SQLite counters, every process using an account draws on its budget
+QUOTA_DAILY_LIMIT = int(get_env_or_default('QUOTA_DAILY_LIMIT', '3000'))
+QUOTA_HOURLY_LIMIT = int(get_env_or_default('QUOTA_HOURLY_LIMIT', '500'))
+QUOTA_RESERVE_RATIO = float(get_env_or_default('QUOTA_RESERVE_RATIO', '0.2'))  # Share of a budget digest detail fetches may not use
+QUOTA_RETENTION_DAYS = int(get_env_or_default('QUOTA_RETENTION_DAYS', '7'))  # Days of hourly counters kept in QUOTA_FILE
+
 # Telegram settings - from environment variables
 TELEGRAM_BOT_TOKEN = get_env_or_default('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = get_env_or_default('TELEGRAM_CHAT_ID')
@@ -31,6 +81,24 @@ TELEGRAM_TOPIC_ERROR_ID = get_env_or_default('TELEGRAM_TOPIC_ERROR_ID', None)
 
 # State persistence
 LAST_CRAWLED_FILE = 'last_crawled.json'
+BACKFILL_DIR = Path(get_env_or_default('BACKFILL_DIR', 'backfill'))  # Output of `crawl.py --backfill`
+
+# Raw API response journal
+JOURNAL_ENABLED = get_env_or_default('JOURNAL_ENABLED', 'false').lower() == 'true'
+JOURNAL_DIR = Path(get_env_or_default('JOURNAL_DIR', 'journal'))
+JOURNAL_SEGMENT_MAX_BYTES = int(float(get_env_or_default('JOURNAL_SEGMENT_MAX_MB', '64')) * 1024 * 1024)
+
+# Group metadata cache
+GROUP_CACHE_DIR = Path(get_env_or_default('GROUP_CACHE_DIR', 'group_cache'))
+GROUP_CACHE_TTL_HOURS = float(get_env_or_default('GROUP_CACHE_TTL_HOURS', '24'))
+GROUP_LOAD_CONCURRENCY = int(get_env_or_default('GROUP_LOAD_CONCURRENCY', '5'))  # Max in-flight group info requests at startup
+GROUP_REFRESH_RETRY_BASE_SECONDS = float(get_env_or_default('GROUP_REFRESH_RETRY_BASE_SECONDS', '60'))
+GROUP_REFRESH_RETRY_MAX_SECONDS = float(get_env_or_default('GROUP_REFRESH_RETRY_MAX_SECONDS', '3600'))
+
+# Topic detail cache
+TOPIC_CACHE_FILE = get_env_or_default('TOPIC_CACHE_FILE', 'topic_cache.db')
+TOPIC_CACHE_TTL_HOURS = float(get_env_or_default('TOPIC_CACHE_TTL_HOURS', '72'))
+TOPIC_CACHE_MAX_ENTRIES = int(get_env_or_default('TOPIC_CACHE_MAX_ENTRIES', '5000'))
 
 
 def validate_config():
@@ -39,7 +107,10 @@ def validate_config():
         raise ValueError("TELEGRAM_BOT_TOKEN is required")
     if not TELEGRAM_CHAT_ID:
         raise ValueError("TELEGRAM_CHAT_ID is required")
-    if not COOKIE:
-        raise ValueError("ZSXQ_COOKIE is required")
+    if ACCOUNT_CONFIG_MANAGER.is_empty():
+        raise ValueError("ZSXQ_COOKIE or ZSXQ_ACCOUNTS is required")
     if GROUP_CONFIG_MANAGER.is_empty():
         raise ValueError("At least one group configuration is required in ZSXQ_GROUPS")
+    unassigned_groups = ACCOUNT_CONFIG_MANAGER.get_unassigned_groups(GROUP_CONFIG_MANAGER.get_group_configs())
+    if unassigned_groups:
+        raise ValueError(f"No account in ZSXQ_ACCOUNTS for groups {unassigned_groups} and ZSXQ_COOKIE is not set")
@@ -1,58 +1,47 @@
 #!/usr/bin/env python3
 """
 知识星球 content crawler
-Supports real-time Telegram notifications
+Supports real-time Telegram notifications and resumable historical backfills
 """
+import argparse
+import json
 import os
-import time
 from datetime import datetime
 
-from config import validate_config, GROUP_CONFIG_MANAGER
+from config import validate_config, BACKFILL_DIR, GROUP_CONFIG_MANAGER
 from src.crawlers.zsxq_crawler import ZsxqCrawler
-from src.formatters.message_formatter import TelegramFormatter
 from src.notifiers.telegram_notifier import TelegramNotifier
+from src.scheduler.delivery_pipeline import DeliveryPipeline
 from src.utils.group_config import GroupConfig
 from src.utils.logger import setup_logger
+from src.utils.quota_manager import QuotaExceededError, QuotaManager
 from src.managers.group_manager import GroupManager
 from state_manager import CrawlType, StateManager
 
 logger = setup_logger(__name__)
 
-def process_topics(crawler, notifier, topics, crawl_type, thread_id):
-    """Process topics: format and send to Telegram"""
-    success_count = 0
-    last_topic_id = None
+def process_topics(crawler, delivery, topics, crawl_type: CrawlType, thread_id):
+    """
+    Queue topics in delivery order, advancing the crawl state to the newest once all of them are in the delivery outbox
     
-    # Process topics from oldest to newest
-    reversed_topics = list(reversed(topics))
-    for topic in reversed_topics:
-        try:
-            # Format and send
-            message = TelegramFormatter.format_topic(topic, crawl_type)
-            notifier.send_message_sync(
-                text=message,
-                thread_id=thread_id,
-                images=topic.talk.images if topic.talk else None,
-                files=topic.talk.files if topic.talk else None,
-                parse_mode='HTML'
-            )
-            success_count += 1
-            logger.info(f"Sent topic: {topic.title or f'ID:{topic.topic_id}'}")
-            
-            # Record last processed topic ID
-            if not last_topic_id or topic.topic_id > last_topic_id:
-                last_topic_id = topic.topic_id
-                
-            time.sleep(2)  # Avoid sending too fast
-            
-        except Exception as e:
-            logger.error(f"Failed to process topic [ID:{topic.topic_id}]: {e}")
-            continue
-            
-    return success_count, last_topic_id
+    A stream that raises part way, on a failed listing page, leaves the crawl state where it was.
+    """
+    queued = 0
+    newest = None
+    for topic in topics:
+        if delivery.submit(crawler.group_id, crawl_type, thread_id, topic):
+            queued += 1
+        if newest is None or topic.create_time > newest.create_time:
+            newest = topic
+    if newest:
+        StateManager.save_state(crawler.group_id, crawl_type, {
+            'last_topic_id': newest.topic_id,
+            'update_time': newest.create_time.isoformat()
+        })
+    return queued
 
 
-def process_group(group_config: GroupConfig, notifier: TelegramNotifier):
+def process_group(group_config: GroupConfig, delivery: DeliveryPipeline):
     """Process a single group"""
     group_id = group_config.get_group_id()
     group_manager = GroupManager()
@@ -66,45 +55,148 @@ def process_group(group_config: GroupConfig, notifier: TelegramNotifier):
     if group_config.get_is_crawl_home():
         home_state = StateManager.get_state(group_id, CrawlType.HOME)
         last_home_id = home_state.get('last_topic_id') if home_state else None
+        last_home_time = home_state.get('update_time') if home_state else None
         
-        topics, new_last_topic_id = crawler.crawl_home_topics(last_topic_id=last_home_id)
-        if topics:
+        queued = 0
+        if crawler.has_new_home_topics(last_home_id, last_home_time):
+            topics = crawler.stream_home_topics(last_topic_id=last_home_id, last_topic_create_time=last_home_time)
             thread_id = group_config.get_thread_id('home')
-            success_count, last_topic_id = process_topics(crawler, notifier, topics, CrawlType.HOME.value, thread_id)
-            if success_count > 0:
-                StateManager.save_state(group_id, CrawlType.HOME, {
-                    'last_topic_id': last_topic_id,
-                    'update_time': datetime.now().isoformat()
-                })
-                logger.info(f"Successfully forwarded {success_count} home updates for group {group_name}")
+            queued = process_topics(crawler, delivery, topics, CrawlType.HOME, thread_id)
+        if queued > 0:
+            logger.info(f"Queued {queued} home updates for group {group_name}")
         else:
             logger.info(f"No new home content for group {group_name}")
     
     # Process digest topics
     digest_state = StateManager.get_state(group_id, CrawlType.DIGEST)
     last_digest_id = digest_state.get('last_topic_id') if digest_state else None
+    last_digest_time = digest_state.get('update_time') if digest_state else None
     
-    digest_topics, new_last_digest_id = crawler.get_digest_topics(last_topic_id=last_digest_id)
-    if digest_topics:
+    queued = 0
+    if crawler.has_new_digest_topics(last_digest_id, last_digest_time):
+        digest_topics = crawler.stream_digest_topics(last_topic_id=last_digest_id, last_topic_create_time=last_digest_time)
         thread_id = group_config.get_thread_id('digest')
-        success_count, last_topic_id = process_topics(crawler, notifier, digest_topics, CrawlType.DIGEST.value, thread_id)
-        if success_count > 0:
-            StateManager.save_state(group_id, CrawlType.DIGEST, {
-                'last_topic_id': last_topic_id,
-                'update_time': datetime.now().isoformat()
-            })
-            logger.info(f"Successfully forwarded {success_count} digest updates for group {group_name}")
+        queued = process_topics(crawler, delivery, digest_topics, CrawlType.DIGEST, thread_id)
+    if queued > 0:
+        logger.info(f"Queued {queued} digest updates for group {group_name}")
     else:
         logger.info(f"No new digest content for group {group_name}")
 
 
+def topic_to_record(topic) -> dict:
+    """Convert a topic into a JSON serializable backfill record"""
+    talk = topic.talk
+    return {
+        'topic_id': topic.topic_id,
+        'group_id': topic.group.group_id,
+        'type': topic.type,
+        'title': topic.title,
+        'text': talk.text if talk else '',
+        'owner': talk.owner.name if talk else '',
+        'create_time': topic.create_time.isoformat(),
+        'likes_count': topic.likes_count,
+        'comments_count': topic.comments_count,
+        'reading_count': topic.reading_count,
+        'digested': topic.digested,
+        'images': [img.original.url for img in talk.images] if talk else [],
+        'files': [{'file_id': f.file_id, 'name': f.name, 'size': f.size} for f in talk.files] if talk else []
+    }
+
+
+def backfill_topics(crawler: ZsxqCrawler, group_id: str, crawl_type: CrawlType, restart: bool = False):
+    """
+    Walk the full history of a group and append every topic to a JSON lines file
+    
+    The pagination cursor is checkpointed after each page together with the
+    size of the output file, so an interrupted backfill resumes from the last
+    finished page and only one page is held in memory. Lines written after the
+    last checkpoint are truncated on resume, so a page is never written twice.
+    """
+    if restart:
+        StateManager.clear_backfill_cursor(group_id, crawl_type)
+    cursor_state = StateManager.get_backfill_cursor(group_id, crawl_type) or {}
+    if cursor_state.get('done'):
+        logger.info(f"{crawl_type.value} backfill of group {group_id} already finished, use --restart to run it again")
+        return
+    
+    cursor = cursor_state.get('cursor')
+    pages = cursor_state.get('pages', 0)
+    topic_count = cursor_state.get('topics', 0)
+    if pages:
+        logger.info(f"Resuming {crawl_type.value} backfill of group {group_id} after {pages} pages, cursor={cursor}")
+    
+    output_file = BACKFILL_DIR / str(group_id) / f"{crawl_type.value}.jsonl"
+    os.makedirs(output_file.parent, exist_ok=True)
+    # A fresh backfill starts an empty file, cursors saved before offsets were tracked can't be checked
+    offset = cursor_state.get('offset', None if cursor_state else 0)
+    if offset is not None and os.path.exists(output_file) and os.path.getsize(output_file) > offset:
+        logger.warning(f"Truncating {output_file} to the last checkpoint at {offset} bytes")
+        with open(output_file, 'r+b') as f:
+            f.truncate(offset)
+    
+    if crawl_type == CrawlType.HOME:
+        page_iter = crawler.iter_home_pages(end_time=cursor)
+    else:
+        page_iter = crawler.iter_digest_pages(index=cursor)
+    
+    try:
+        for topics, next_cursor in page_iter:
+            with open(output_file, 'a', encoding='utf-8') as f:
+                for topic in topics:
+                    f.write(json.dumps(topic_to_record(topic), ensure_ascii=False) + '\n')
+            pages += 1
+            topic_count += len(topics)
+            StateManager.save_backfill_cursor(group_id, crawl_type, {
+                'cursor': next_cursor,
+                'pages': pages,
+                'topics': topic_count,
+                'offset': os.path.getsize(output_file),
+                'done': next_cursor is None,
+                'update_time': datetime.now().isoformat()
+            })
+            if next_cursor is None:
+                logger.info(f"Finished {crawl_type.value} backfill of group {group_id}: {topic_count} topics in {pages} pages -> {output_file}")
+                return
+    except QuotaExceededError as e:
+        logger.warning(f"{crawl_type.value} backfill of group {group_id} stopped after {pages} pages: {e}, run again to resume")
+        return
+    logger.warning(f"{crawl_type.value} backfill of group {group_id} interrupted after {pages} pages, run again to resume")
+
+
+def backfill(group_ids, restart: bool = False):
+    """Backfill home (if enabled) and digest history of the given groups"""
+    for group_id in group_ids:
+        group_config = GROUP_CONFIG_MANAGER.get_group_config(group_id)
+        if not group_config:
+            logger.error(f"Group {group_id} is not configured")
+            continue
+        crawler = ZsxqCrawler(group_id)
+        if group_config.get_is_crawl_home():
+            backfill_topics(crawler, group_id, CrawlType.HOME, restart)
+        backfill_topics(crawler, group_id, CrawlType.DIGEST, restart)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="知识星球 content crawler")
+    parser.add_argument('--backfill', action='store_true', help="walk the full group history into BACKFILL_DIR instead of forwarding new topics")
+    parser.add_argument('--group', action='append', dest='groups', help="group ID to backfill, may be repeated (default: all configured groups)")
+    parser.add_argument('--restart', action='store_true', help="discard saved backfill cursors and start over")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    
     # Validate environment variables
     try:
         validate_config()
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
         return
+    
+    if args.backfill:
+        backfill(args.groups or GROUP_CONFIG_MANAGER.get_group_configs(), args.restart)
+        return
 
     # Initialize group manager and load group info
     group_manager = GroupManager()
@@ -112,8 +204,9 @@ def main():
         logger.error("Failed to initialize groups, exiting...")
         return
 
-    # Initialize notifier
+    # Initialize notifier, resuming delivery of anything a previous run left in the outbox
     notifier = TelegramNotifier()
+    delivery = DeliveryPipeline(notifier)
     
     try:
         logger.info("Starting to crawl 知识星球 content...")
@@ -121,13 +214,24 @@ def main():
         # Process each configured group
         for group_id in GROUP_CONFIG_MANAGER.get_group_configs():
             group_config = GROUP_CONFIG_MANAGER.get_group_config(group_id)
-            if group_config:
-                process_group(group_config, notifier)
+            if not group_config:
+                continue
+            try:
+                process_group(group_config, delivery)
+            except QuotaExceededError as e:
+                logger.warning(f"Stopped processing group {group_id}: {e}")
+            except Exception as e:
+                # The topics queued so far are still delivered, the crawl state stays put
+                logger.error(f"Error processing group {group_id}: {str(e)}")
+        
+        delivery.wait_idle()
             
     except Exception as e:
         logger.error(f"Error during crawling: {str(e)}")
         return
     finally:
+        delivery.stop()
+        QuotaManager().log_stats()
         group_manager.close()
 
 
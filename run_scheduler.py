@@ -3,12 +3,18 @@
 知识星球 content crawler scheduler
 Runs periodic crawls and sends updates to Telegram
 """
-from config import validate_config, GROUP_CONFIG_MANAGER, CRAWL_INTERVAL_MINUTES, TEMP_DIR, LAST_CRAWLED_FILE
+import signal
+
+from config import validate_config, GROUP_CONFIG_MANAGER, CRAWL_INTERVAL_MINUTES, CRAWL_LEASE_FILE, TEMP_DIR, LAST_CRAWLED_FILE
 from src.scheduler.crawl_scheduler import CrawlScheduler
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+def stop_on_sigterm(signum, frame):
+    """Unwind the scheduler loop on SIGTERM the way Ctrl-C does, so it stops and releases its group leases"""
+    raise KeyboardInterrupt
+
 def main():
     # Validate environment variables
     try:
@@ -21,7 +27,11 @@ def main():
     logger.info(f"Crawl interval: {CRAWL_INTERVAL_MINUTES} minutes")
     logger.info(f"Temp directory: {TEMP_DIR}")
     logger.info(f"Group config manager: {LAST_CRAWLED_FILE}")
+    if CRAWL_LEASE_FILE:
+        logger.info(f"Sharing groups with other replicas through leases in {CRAWL_LEASE_FILE}")
 
+    # Container runtimes stop replicas with SIGTERM
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
     try:
         # Initialize and start scheduler
         scheduler = CrawlScheduler(GROUP_CONFIG_MANAGER)
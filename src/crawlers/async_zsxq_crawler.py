@@ -0,0 +1,305 @@
+"""
+Asynchronous 知识星球 content crawler implementation
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from config import DETAIL_FETCH_CONCURRENCY, PROBE_TOPICS_COUNT, RATE_LIMIT_MAX_RETRIES
+
+from .models import Topic, SimpleTopic
+from .zsxq_crawler import CrawlIncompleteError, ZsxqCrawler
+from src.utils.logger import setup_logger
+from src.utils.quota_manager import QuotaExceededError
+
+logger = setup_logger(__name__)
+
+
+class ApiStatusError(aiohttp.ClientError):
+    """Raised when an API request is answered with an HTTP error status"""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+
+
+class AsyncZsxqCrawler(ZsxqCrawler):
+    """
+    asyncio variant of ZsxqCrawler
+
+    All instances share the pooled aiohttp session of HttpClient, so crawls of
+    different groups reuse keep-alive connections and can run concurrently
+    with asyncio.gather. Call `HttpClient.close_async_session` once the event
+    loop is done crawling.
+
+    Only the I/O differs from ZsxqCrawler: requests, pagination cursors and
+    stop decisions come from its shared helpers, and the blocking quota, topic
+    cache and journal calls run in worker threads so they never stall the
+    event loop.
+    """
+
+    async def _charge_attempt(self, endpoint: str):
+        """Count one HTTP attempt against the account's quota and wait for the rate limiter"""
+        await asyncio.to_thread(self.quota.acquire, self.account, self.group_id, endpoint, low_priority=endpoint == 'detail')
+        await self.rate_limiter.acquire_async()
+
+    async def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None, endpoint: str = 'listing') -> Dict[str, Any]:
+        """
+        Send API request and return JSON response, backing off and retrying when throttled
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            endpoint: Endpoint kind ('listing' or 'detail')
+
+        Raises:
+            QuotaExceededError: The account's API call budget is used up
+        """
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                # Every HTTP attempt, including the client's own retries, is a call zsxq counts
+                status, data = await self.http_client.get_json_async(url, headers=self.headers, params=params,
+                                                                     before_attempt=lambda: self._charge_attempt(endpoint))
+            except aiohttp.ClientError as e:
+                logger.error(f"API request failed: {e}")
+                raise
+            throttled = status == 429
+            if status >= 400 and (not throttled or attempt == RATE_LIMIT_MAX_RETRIES):
+                logger.error(f"API request failed: HTTP {status} for {url}")
+                raise ApiStatusError(status, url)
+            throttled = throttled or self._is_throttled(data)
+            if not throttled:
+                await asyncio.to_thread(self._accept_response, endpoint, url, params, data)
+                return data
+            self.rate_limiter.on_throttle()
+            logger.warning(f"Request throttled (attempt {attempt + 1}): {url}")
+        # Out of retries: hand the throttle response back to the caller
+        return data
+
+    async def has_new_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> bool:
+        """Cheaply check whether home has topics newer than the saved state"""
+        if not last_topic_id and not last_topic_create_time:
+            return True
+        try:
+            data = await self._make_request(*self._home_request(count=PROBE_TOPICS_COUNT))
+            return self._has_new_topics(data, last_topic_id, last_topic_create_time)
+        except Exception as e:
+            logger.error(f"Failed to probe home topics for group {self.group_name}: {e}")
+            return True
+
+    async def has_new_digest_topics(self, last_topic_id=None, last_topic_create_time=None) -> bool:
+        """Cheaply check whether digests have topics newer than the saved state"""
+        if not last_topic_id and not last_topic_create_time:
+            return True
+        try:
+            data = await self._make_request(*self._digest_request(count=1))
+            return self._has_new_topics(data, last_topic_id, last_topic_create_time)
+        except Exception as e:
+            logger.error(f"Failed to probe digest topics for group {self.group_name}: {e}")
+            return True
+
+    async def get_topic_detail(self, topic_id: str) -> Optional[Topic]:
+        """
+        Get detailed information for a single topic, served from the topic cache when possible
+
+        Returns:
+            Topic: The topic, None if the API refuses it for good (a 4xx status or an API error code)
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
+            Exception: A transient failure (connection error, server error, throttling), the
+                detail may still be fetched on a later poll
+        """
+        topic = await asyncio.to_thread(self._cached_topic, topic_id)
+        if topic:
+            return topic
+        try:
+            data = await self._make_request(f"{self.base_url}/topics/{topic_id}/info", endpoint='detail')
+        except ApiStatusError as e:
+            if not self._is_unavailable_status(e.status):
+                raise
+            logger.warning(f"Topic detail unavailable (ID: {topic_id}): {e}, skipping")
+            return None
+        return await asyncio.to_thread(self._read_topic_detail, topic_id, data)
+
+    async def _fetch_topic_details(self, simple_topics: List[SimpleTopic], concurrency: int) -> List[Topic]:
+        """
+        Fetch details for a page of topics with at most `concurrency` requests in flight
+
+        Returns:
+            list: Fetched topics in the same order as `simple_topics`, without the ones
+                the API refused for good
+
+        Raises:
+            Exception: A detail failed transiently; the whole page fails rather than being
+                delivered with topics missing
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(topic_id):
+            async with semaphore:
+                return await self.get_topic_detail(topic_id)
+
+        details = await asyncio.gather(*(fetch(topic.topic_id) for topic in simple_topics))
+        return self._available_details(details)
+
+    async def iter_digest_pages(self, index: Optional[str] = None, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc', last_topic_id: Optional[str] = None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> AsyncIterator[Tuple[List[Topic], Optional[str]]]:
+        """
+        Crawl digest topics page by page
+
+        Args:
+            index: Pagination cursor to resume from, None to start from the newest topics
+            count: Number of topics to fetch per request
+            sort: Sort method ('by_create_time')
+            direction: Sort direction ('desc' or 'asc')
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            concurrency: Max topic detail requests in flight
+
+        Yields:
+            tuple: (topics of the page, cursor of the next page). The cursor is None on the
+            final page; a crawl aborted by an error ends without yielding a None cursor.
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
+        """
+        watermark = self._to_watermark(last_topic_create_time)
+
+        while True:
+            try:
+                logger.info(f"Fetching digest topics for group {self.group_name}, index={index}")
+                data = await self._make_request(*self._digest_request(index, count, sort, direction))
+                simple_topics, index = self._read_digest_listing(data, last_topic_id, watermark)
+                current_batch = await self._fetch_topic_details(simple_topics, concurrency)
+            except QuotaExceededError:
+                # Out of budget, let the caller leave its crawl state where it was
+                raise
+            except Exception as e:
+                logger.error(f"Failed to get digest topics for group {self.group_name}: {str(e)}")
+                return
+
+            yield current_batch, index
+            if index is None:
+                return
+
+    async def get_digest_topics(self, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc', last_topic_id: Optional[str] = None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> Tuple[List[Topic], Optional[str]]:
+        """
+        Get digest topics list
+
+        Args:
+            count: Number of topics to fetch per request
+            sort: Sort method ('by_create_time')
+            direction: Sort direction ('desc' or 'asc')
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            concurrency: Max topic detail requests in flight
+
+        Returns:
+            tuple: (topics, last_topic_id)
+        """
+        all_topics = []
+        async for current_batch, _ in self.iter_digest_pages(count=count, sort=sort, direction=direction, last_topic_id=last_topic_id,
+                                                             last_topic_create_time=last_topic_create_time, concurrency=concurrency):
+            all_topics.extend(current_batch)
+        return self._crawl_result(all_topics)
+
+    async def iter_home_pages(self, end_time: Optional[str] = None, last_topic_id=None, last_topic_create_time=None) -> AsyncIterator[Tuple[List[Topic], Optional[str]]]:
+        """
+        Crawl home page topics page by page
+
+        Args:
+            end_time: Pagination cursor to resume from, None to start from the newest topics
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+
+        Yields:
+            tuple: (topics of the page, cursor of the next page). The cursor is None on the
+            final page; a crawl aborted by an error ends without yielding a None cursor.
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
+        """
+        watermark = self._to_watermark(last_topic_create_time)
+
+        while True:
+            try:
+                logger.info(f"Fetching home topics for group {self.group_name}, end_time={end_time}")
+                data = await self._make_request(*self._home_request(end_time))
+                # Parsing a home page also stores its topics in the topic cache
+                current_batch, end_time = await asyncio.to_thread(self._read_home_listing, data, last_topic_id, watermark)
+            except QuotaExceededError:
+                # Out of budget, let the caller leave its crawl state where it was
+                raise
+            except Exception as e:
+                logger.error(f"Error while crawling content for group {self.group_name}: {str(e)}")
+                return
+
+            yield current_batch, end_time
+            if end_time is None:
+                return
+
+    async def crawl_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> Tuple[List[Topic], Optional[str]]:
+        """
+        Crawl home page topics
+
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+
+        Returns:
+            tuple: (topics, last_topic_id)
+        """
+        all_topics = []
+        async for current_batch, _ in self.iter_home_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time):
+            all_topics.extend(current_batch)
+        return self._crawl_result(all_topics)
+
+    async def stream_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> AsyncIterator[Topic]:
+        """
+        Stream new home topics as soon as each page is fetched
+
+        Topics of a page are yielded oldest first. Pages are still fetched newest
+        first, so on a multi-page catch-up an earlier page holds newer topics.
+
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic
+
+        Raises:
+            CrawlIncompleteError: The listing failed before its last page, after the
+                topics of the pages fetched so far were yielded
+            QuotaExceededError: The account's API call budget ran out part way
+        """
+        completed = False
+        async for current_batch, cursor in self.iter_home_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time):
+            for topic in sorted(current_batch, key=lambda x: x.create_time):
+                yield topic
+            completed = cursor is None
+        if not completed:
+            raise CrawlIncompleteError(f"Home listing of group {self.group_name} stopped before its last page")
+
+    async def stream_digest_topics(self, last_topic_id=None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> AsyncIterator[Topic]:
+        """
+        Stream new digest topics as soon as each page is fetched
+
+        Topics of a page are yielded oldest first. Pages are still fetched newest
+        first, so on a multi-page catch-up an earlier page holds newer topics.
+
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic
+            concurrency: Max topic detail requests in flight
+
+        Raises:
+            CrawlIncompleteError: The listing failed before its last page, after the
+                topics of the pages fetched so far were yielded
+            QuotaExceededError: The account's API call budget ran out part way
+        """
+        completed = False
+        async for current_batch, cursor in self.iter_digest_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time, concurrency=concurrency):
+            for topic in sorted(current_batch, key=lambda x: x.create_time):
+                yield topic
+            completed = cursor is None
+        if not completed:
+            raise CrawlIncompleteError(f"Digest listing of group {self.group_name} stopped before its last page")
@@ -0,0 +1,289 @@
+"""
+Typed decoding of 知识星球 API payloads into crawler models
+
+The payload schemas below mirror the models in models.py with the same
+defaults as their `from_dict` classmethods. msgspec validates and converts
+a payload against them in native code, skipping fields the models don't
+use. Fields the models decode lazily are left untyped and handed over raw.
+Payloads that don't fit the schema, a missing or malformed create_time
+included, fall back to `from_dict`, which raises the same ValueError as
+every other model for bad timestamps.
+
+The crawlers decode a response body once with `decode_json` and convert
+each topic with `topic_from_dict` / `simple_topic_from_dict`: the raw topic
+dicts are still needed by the topic cache and the response journal.
+`decode_topics` and `decode_topic` go from bytes straight to models without
+the intermediate dicts, for callers that don't keep the raw payload; see
+benchmarks/bench_decode.py for how the two paths compare.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+import msgspec
+
+from .models import (
+    EmojiLike, File, Group, Image, ImageSize, Like, LikesDetail, SimpleTopic, Talk, Topic, User, UserSpecific, Lazy
+)
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _EmojiLikePayload(msgspec.Struct):
+    emoji_key: str = ''
+    likes_count: int = 0
+
+    def to_model(self) -> EmojiLike:
+        return EmojiLike(emoji_key=self.emoji_key, likes_count=self.likes_count)
+
+
+class _LikesDetailPayload(msgspec.Struct):
+    emojis: List[_EmojiLikePayload] = []
+
+    def to_model(self) -> LikesDetail:
+        return LikesDetail(emojis=[emoji.to_model() for emoji in self.emojis])
+
+
+class _UserPayload(msgspec.Struct):
+    user_id: int = 0
+    name: Optional[str] = ''
+    avatar_url: Optional[str] = ''
+    description: Optional[str] = None
+    location: Optional[str] = None
+    number: Optional[int] = None
+    ai_comment_url: Optional[str] = None
+
+    def to_model(self) -> User:
+        return User(
+            user_id=self.user_id,
+            name=self.name,
+            avatar_url=self.avatar_url,
+            description=self.description,
+            location=self.location,
+            number=self.number,
+            ai_comment_url=self.ai_comment_url
+        )
+
+
+class _GroupPayload(msgspec.Struct):
+    group_id: int = 0
+    name: Optional[str] = ''
+    type: Optional[str] = ''
+    background_url: Optional[str] = ''
+
+    def to_model(self) -> Group:
+        return Group(group_id=self.group_id, name=self.name, type=self.type, background_url=self.background_url)
+
+
+class _FilePayload(msgspec.Struct, kw_only=True):
+    file_id: int = 0
+    name: Optional[str] = ''
+    hash: Optional[str] = ''
+    size: Optional[int] = 0
+    download_count: Optional[int] = 0
+    create_time: datetime
+
+    def to_model(self) -> File:
+        return File(
+            file_id=self.file_id,
+            name=self.name,
+            hash=self.hash,
+            size=self.size,
+            download_count=self.download_count,
+            create_time=self.create_time
+        )
+
+
+class _ImageSizePayload(msgspec.Struct):
+    url: Optional[str] = ''
+    width: Optional[int] = 0
+    height: Optional[int] = 0
+    size: Optional[int] = None
+
+    def to_model(self) -> ImageSize:
+        return ImageSize(url=self.url, width=self.width, height=self.height, size=self.size)
+
+
+class _ImagePayload(msgspec.Struct):
+    image_id: int = 0
+    type: Optional[str] = ''
+    thumbnail: Any = None
+    large: Any = None
+    original: _ImageSizePayload = msgspec.field(default_factory=_ImageSizePayload)
+
+    def to_model(self) -> Image:
+        return Image(
+            image_id=self.image_id,
+            type=self.type,
+            original=self.original.to_model(),
+            _thumbnail=Lazy(ImageSize.from_dict, self.thumbnail or {}),
+            _large=Lazy(ImageSize.from_dict, self.large or {})
+        )
+
+
+class _TalkPayload(msgspec.Struct):
+    owner: _UserPayload = msgspec.field(default_factory=_UserPayload)
+    text: Optional[str] = ''
+    images: List[_ImagePayload] = []
+    files: List[_FilePayload] = []
+    title: Optional[str] = None
+
+    def to_model(self) -> Talk:
+        return Talk(
+            owner=self.owner.to_model(),
+            text=self.text,
+            images=[image.to_model() for image in self.images],
+            files=[file.to_model() for file in self.files],
+            title=self.title
+        )
+
+
+class _TopicPayload(msgspec.Struct, kw_only=True):
+    topic_id: int = 0
+    group: _GroupPayload = msgspec.field(default_factory=_GroupPayload)
+    type: Optional[str] = ''
+    talk: Optional[_TalkPayload] = None
+    latest_likes: Any = None
+    create_time: datetime
+    likes_count: int = 0
+    tourist_likes_count: int = 0
+    likes_detail: Optional[_LikesDetailPayload] = None
+    rewards_count: int = 0
+    comments_count: int = 0
+    reading_count: int = 0
+    readers_count: int = 0
+    digested: bool = False
+    sticky: bool = False
+    user_specific: Any = None
+    title: Optional[str] = None
+
+    def to_model(self) -> Topic:
+        return Topic(
+            topic_id=self.topic_id,
+            group=self.group.to_model(),
+            type=self.type,
+            talk=(self.talk or _TalkPayload()).to_model(),
+            create_time=self.create_time,
+            likes_count=self.likes_count,
+            tourist_likes_count=self.tourist_likes_count,
+            likes_detail=self.likes_detail.to_model() if self.likes_detail else None,
+            rewards_count=self.rewards_count,
+            comments_count=self.comments_count,
+            reading_count=self.reading_count,
+            readers_count=self.readers_count,
+            digested=self.digested,
+            sticky=self.sticky,
+            title=self.title,
+            _latest_likes=Lazy(Like.from_dicts, self.latest_likes) if self.latest_likes else [],
+            _user_specific=Lazy(UserSpecific.from_dict, self.user_specific) if self.user_specific else None
+        )
+
+
+class _SimpleTopicPayload(msgspec.Struct, kw_only=True):
+    topic_id: int = 0
+    title: Optional[str] = ''
+    create_time: datetime
+    likes_count: int = 0
+    owner: _UserPayload = msgspec.field(default_factory=_UserPayload)
+
+    def to_model(self) -> SimpleTopic:
+        return SimpleTopic(
+            topic_id=self.topic_id,
+            title=self.title,
+            create_time=self.create_time,
+            likes_count=self.likes_count,
+            owner=self.owner.to_model()
+        )
+
+
+class _TopicListPayload(msgspec.Struct):
+    index: Union[str, int, None] = None
+    topics: List[_TopicPayload] = []
+
+
+class _TopicListResponse(msgspec.Struct):
+    succeeded: bool = False
+    resp_data: _TopicListPayload = msgspec.field(default_factory=_TopicListPayload)
+
+
+class _TopicDetailPayload(msgspec.Struct):
+    topic: Optional[_TopicPayload] = None
+
+
+class _TopicDetailResponse(msgspec.Struct):
+    succeeded: bool = False
+    resp_data: _TopicDetailPayload = msgspec.field(default_factory=_TopicDetailPayload)
+
+
+_json_decoder = msgspec.json.Decoder()
+_list_decoder = msgspec.json.Decoder(_TopicListResponse)
+_detail_decoder = msgspec.json.Decoder(_TopicDetailResponse)
+
+
+def decode_json(content: Union[bytes, str]) -> Any:
+    """Decode a JSON document into plain Python objects, a faster drop-in for json.loads"""
+    return _json_decoder.decode(content)
+
+
+def topic_from_dict(data: Dict[str, Any]) -> Topic:
+    """Build a Topic from raw topic data, equivalent to Topic.from_dict"""
+    try:
+        return msgspec.convert(data, _TopicPayload, strict=False).to_model()
+    except msgspec.ValidationError as e:
+        logger.warning(f"Topic {data.get('topic_id')} does not match the typed schema ({e}), falling back to from_dict")
+        return Topic.from_dict(data)
+
+
+def simple_topic_from_dict(data: Dict[str, Any]) -> SimpleTopic:
+    """Build a SimpleTopic from raw topic data, equivalent to SimpleTopic.from_dict"""
+    try:
+        return msgspec.convert(data, _SimpleTopicPayload, strict=False).to_model()
+    except msgspec.ValidationError as e:
+        logger.warning(f"Topic {data.get('topic_id')} does not match the typed schema ({e}), falling back to from_dict")
+        return SimpleTopic.from_dict(data)
+
+
+def decode_topics(content: Union[bytes, str]) -> List[Topic]:
+    """
+    Decode a topic listing response straight into Topics, without keeping the raw topic dicts
+
+    Args:
+        content: Raw response body of a topics or digests request
+
+    Returns:
+        list: Topics of the page, empty if the request did not succeed
+    """
+    try:
+        response = _list_decoder.decode(content)
+    except msgspec.ValidationError as e:
+        logger.warning(f"Topic listing does not match the typed schema ({e}), falling back to from_dict")
+        data = decode_json(content)
+        if not data.get('succeeded'):
+            return []
+        return [Topic.from_dict(topic) for topic in data.get('resp_data', {}).get('topics', [])]
+    if not response.succeeded:
+        return []
+    return [topic.to_model() for topic in response.resp_data.topics]
+
+
+def decode_topic(content: Union[bytes, str]) -> Optional[Topic]:
+    """
+    Decode a topic detail response straight into a Topic, without keeping the raw topic dict
+
+    Args:
+        content: Raw response body of a topic info request
+
+    Returns:
+        Topic: The topic, None if the request did not succeed
+    """
+    try:
+        response = _detail_decoder.decode(content)
+    except msgspec.ValidationError as e:
+        logger.warning(f"Topic detail does not match the typed schema ({e}), falling back to from_dict")
+        data = decode_json(content)
+        if not data.get('succeeded'):
+            return None
+        return Topic.from_dict(data['resp_data']['topic'])
+    if not response.succeeded or response.resp_data.topic is None:
+        return None
+    return response.resp_data.topic.to_model()
@@ -1,20 +1,72 @@
 """
 Data models for 知识星球 content
+
+Models are slotted and intern strings that repeat across topics (user and
+group names, avatar URLs, types), which keeps large batches such as
+backfills compact. Sub-objects the pipeline rarely reads (likes, user
+specific flags, thumbnail and large image sizes) are kept as their raw data
+and only decoded on first access.
 """
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
-import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+
+import msgspec
+
 from src.utils.logger import setup_logger
+from src.utils.time_parser import parse_zsxq_time
 
 logger = setup_logger(__name__)
 
 
+def _intern(value):
+    """Intern a repeated string so equal values share one object"""
+    return sys.intern(value) if type(value) is str else value
+
+
+_raw_encoder = msgspec.json.Encoder()
+_raw_decoder = msgspec.json.Decoder()
+
+
+class Lazy:
+    """
+    Builder of a model field that is decoded from its raw data on first access
 
-@dataclass
+    The raw data is kept as compact JSON rather than as the dicts it came
+    in, which would take more memory than the built models.
+    """
+    __slots__ = ('build', 'encoded')
+
+    def __init__(self, build: Callable[[Any], Any], raw: Any):
+        """
+        Args:
+            build: Builds the field value from the raw data, e.g. UserSpecific.from_dict
+            raw: Raw data of the field
+        """
+        self.build = build
+        self.encoded = _raw_encoder.encode(raw)
+
+    def __call__(self):
+        return self.build(_raw_decoder.decode(self.encoded))
+
+
+def _resolve(obj, name: str):
+    """Read a lazy field, replacing its builder with the built value on first access"""
+    value = getattr(obj, name)
+    if callable(value):
+        value = value()
+        setattr(obj, name, value)
+    return value
+
+
+@dataclass(slots=True)
 class EmojiLike:
     emoji_key: str
     likes_count: int
+
+    def __post_init__(self):
+        self.emoji_key = _intern(self.emoji_key)
     
     @classmethod
     def from_dict(cls, data: dict):
@@ -24,7 +76,7 @@ class EmojiLike:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LikesDetail:
     emojis: List[EmojiLike] = field(default_factory=list)
     
@@ -36,7 +88,7 @@ class LikesDetail:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     user_id: int
     name: str
@@ -46,6 +98,11 @@ class User:
     number: Optional[int] = None
     ai_comment_url: Optional[str] = None
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.avatar_url = _intern(self.avatar_url)
+        self.location = _intern(self.location)
+
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
@@ -59,13 +116,18 @@ class User:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Group:
     group_id: int
     name: str
     type: str
     background_url: str
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.type = _intern(self.type)
+        self.background_url = _intern(self.background_url)
+
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
@@ -76,7 +138,7 @@ class Group:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class File:
     file_id: int
     name: str
@@ -87,47 +149,34 @@ class File:
 
     @classmethod
     def from_dict(cls, data: dict):
-        create_time_str = data.get('create_time', '')
-        try:
-            create_time = datetime.strptime(create_time_str, '%Y-%m-%dT%H:%M:%S.%f%z')
-        except ValueError:
-            try:
-                create_time = datetime.strptime(create_time_str, '%Y-%m-%dT%H:%M:%S%z')
-            except ValueError:
-                create_time = datetime.now()
-        
         return cls(
             file_id=int(data.get('file_id', 0)),
             name=data.get('name', ''),
             hash=data.get('hash', ''),
             size=data.get('size', 0),
             download_count=data.get('download_count', 0),
-            create_time=create_time
+            create_time=parse_zsxq_time(data.get('create_time', ''))
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Like:
     create_time: datetime
     owner: User
 
     @classmethod
     def from_dict(cls, data: dict):
-        create_time_str = data.get('create_time', '')
-        try:
-            create_time = datetime.strptime(create_time_str, '%Y-%m-%dT%H:%M:%S.%f%z')
-        except ValueError:
-            try:
-                create_time = datetime.strptime(create_time_str, '%Y-%m-%dT%H:%M:%S%z')
-            except ValueError:
-                create_time = datetime.now()
         return cls(
-            create_time=create_time,
+            create_time=parse_zsxq_time(data.get('create_time', '')),
             owner=User.from_dict(data.get('owner', {}))
         )
 
+    @classmethod
+    def from_dicts(cls, items: List[dict]) -> List['Like']:
+        return [cls.from_dict(item) for item in items]
+
 
-@dataclass
+@dataclass(slots=True)
 class UserSpecific:
     liked: bool
     liked_emojis: List[str]
@@ -142,7 +191,7 @@ class UserSpecific:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageSize:
     url: str
     width: int
@@ -158,25 +207,39 @@ class ImageSize:
             size=data.get('size')
         )
 
-@dataclass
+@dataclass(slots=True)
 class Image:
     image_id: int
     type: str
-    thumbnail: ImageSize
-    large: ImageSize
     original: ImageSize
+    # ImageSize or a builder of it, see the properties below
+    _thumbnail: Any = field(default=None, repr=False, compare=False)
+    _large: Any = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.type = _intern(self.type)
+
+    @property
+    def thumbnail(self) -> ImageSize:
+        """Thumbnail size, decoded on first access"""
+        return _resolve(self, '_thumbnail')
+
+    @property
+    def large(self) -> ImageSize:
+        """Large size, decoded on first access"""
+        return _resolve(self, '_large')
 
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
             image_id=int(data.get('image_id', 0)),
             type=data.get('type', ''),
-            thumbnail=ImageSize.from_dict(data.get('thumbnail', {})),
-            large=ImageSize.from_dict(data.get('large', {})),
-            original=ImageSize.from_dict(data.get('original', {}))
+            original=ImageSize.from_dict(data.get('original', {})),
+            _thumbnail=Lazy(ImageSize.from_dict, data.get('thumbnail', {})),
+            _large=Lazy(ImageSize.from_dict, data.get('large', {}))
         )
 
-@dataclass
+@dataclass(slots=True)
 class Talk:
     owner: User
     text: str
@@ -197,13 +260,12 @@ class Talk:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Topic:
     topic_id: int
     group: Group
     type: str
     talk: Talk
-    latest_likes: List[Like]
     create_time: datetime
     likes_count: int = 0
     tourist_likes_count: int = 0
@@ -214,26 +276,32 @@ class Topic:
     readers_count: int = 0
     digested: bool = False
     sticky: bool = False
-    user_specific: Optional[UserSpecific] = None
     title: Optional[str] = None
+    # Values or builders of them, see the properties below
+    _latest_likes: Any = field(default_factory=list, repr=False, compare=False)
+    _user_specific: Any = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.type = _intern(self.type)
+
+    @property
+    def latest_likes(self) -> List[Like]:
+        """Latest likes, decoded on first access"""
+        return _resolve(self, '_latest_likes')
+
+    @property
+    def user_specific(self) -> Optional[UserSpecific]:
+        """The current user's like and subscription flags, decoded on first access"""
+        return _resolve(self, '_user_specific')
 
     @classmethod
     def from_dict(cls, data: dict):
-        latest_likes = [Like.from_dict(like) for like in data.get('latest_likes', [])]
-        create_time_str = data.get('create_time', '')
-        try:
-            create_time = pd.to_datetime(create_time_str)
-        except ValueError as e:
-            logger.error(f"create time parse error:{e}")
-            create_time = datetime.now()
-
         return cls(
             topic_id=int(data.get('topic_id', 0)),
             group=Group.from_dict(data.get('group', {})),
             type=data.get('type', ''),
             talk=Talk.from_dict(data.get('talk', {})),
-            latest_likes=latest_likes,
-            create_time=create_time,
+            create_time=parse_zsxq_time(data.get('create_time', '')),
             likes_count=data.get('likes_count', 0),
             tourist_likes_count=data.get('tourist_likes_count', 0),
             likes_detail=LikesDetail.from_dict(data.get('likes_detail', {})) if data.get('likes_detail') else None,
@@ -243,8 +311,9 @@ class Topic:
             readers_count=data.get('readers_count', 0),
             digested=data.get('digested', False),
             sticky=data.get('sticky', False),
-            user_specific=UserSpecific.from_dict(data.get('user_specific', {})) if data.get('user_specific') else None,
-            title=data.get('title')
+            title=data.get('title'),
+            _latest_likes=Lazy(Like.from_dicts, data['latest_likes']) if data.get('latest_likes') else [],
+            _user_specific=Lazy(UserSpecific.from_dict, data['user_specific']) if data.get('user_specific') else None
         )
     def get_timestamp(self) -> Optional[datetime]:
         """Get the creation time as a datetime object"""
@@ -252,7 +321,7 @@ class Topic:
             return self.create_time
         return None
 
-@dataclass
+@dataclass(slots=True)
 class SimpleTopic:
     topic_id: int
     title: str
@@ -262,17 +331,10 @@ class SimpleTopic:
 
     @classmethod
     def from_dict(cls, data: dict):
-        create_time_str = data.get('create_time', '')
-        try:
-            create_time = datetime.strptime(create_time_str, '%Y-%m-%dT%H:%M:%S.%f%z')
-        except ValueError as e:
-            logger.error(f"create_time parse is error: {e}")
-            create_time = datetime.now()
-
         return cls(
             topic_id=int(data.get('topic_id', 0)),
             title=data.get('title', ''),
             likes_count=data.get('likes_count', 0),
             owner=User.from_dict(data.get('owner', {})),
-            create_time=create_time
+            create_time=parse_zsxq_time(data.get('create_time', ''))
         )
\ No newline at end of file
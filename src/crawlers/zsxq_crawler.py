@@ -2,23 +2,33 @@
 知识星球 content crawler implementation
 """
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 import os
 
 import requests
 
-from config import COOKIE, GROUP_CONFIG_MANAGER
+from config import ACCOUNT_CONFIG_MANAGER, DETAIL_FETCH_CONCURRENCY, GROUP_CONFIG_MANAGER, JOURNAL_ENABLED, PROBE_TOPICS_COUNT, RATE_LIMIT_MAX_RETRIES, ZSXQ_API_BASE_URL, ZSXQ_THROTTLE_CODES
 
+from .decoder import decode_json, simple_topic_from_dict, topic_from_dict
 from .models import Topic, SimpleTopic
+from src.utils.http_client import HttpClient
 from src.utils.logger import setup_logger
+from src.utils.quota_manager import QuotaExceededError, QuotaManager
+from src.utils.rate_limiter import AdaptiveRateLimiter
+from src.utils.response_journal import ResponseJournal
+from src.utils.topic_cache import TopicCache
 from src.managers.group_manager import GroupManager
 
 logger = setup_logger(__name__)
 
 
+class CrawlIncompleteError(Exception):
+    """Raised when a topic listing stops before its last page, so topics older than the ones seen may be missing"""
+
+
 class ZsxqCrawler:
     def __init__(self, group_id: str):
         """
@@ -27,201 +37,535 @@ class ZsxqCrawler:
         Args:
             group_id: Group ID to crawl
         """
-        self.headers = {
-            'Cookie': "zsxq_access_token=" + COOKIE,
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        self.account = ACCOUNT_CONFIG_MANAGER.get_account_for_group(group_id)
+        if not self.account:
+            raise ValueError(f"No account configured for group {group_id}")
+        self.headers = self.account.get_headers()
+        self.http_client = HttpClient()
         self.group_id = group_id
-        self.group_name = GroupManager().get_group_name(group_id)
-        self.base_url = 'https://api.zsxq.com/v2'
+        self.base_url = ZSXQ_API_BASE_URL
+        self.topic_cache = TopicCache()
+        self.quota = QuotaManager()
+        self.rate_limiter = AdaptiveRateLimiter.for_key(self.account.name, self.account.rate, self.account.max_rate)
+        self.journal = ResponseJournal.for_group(group_id) if JOURNAL_ENABLED else None
+
+    @property
+    def group_name(self) -> str:
+        """Group name for log messages, current as the group info gets loaded or refreshed"""
+        return GroupManager().get_group_name(self.group_id)
+        
+    @staticmethod
+    def _is_throttled(data: Dict[str, Any]) -> bool:
+        """Check whether an API response is a throttling error"""
+        return not data.get('succeeded') and data.get('code') in ZSXQ_THROTTLE_CODES
+
+    def _charge_attempt(self, endpoint: str):
+        """Count one HTTP attempt against the account's quota and wait for the rate limiter"""
+        self.quota.acquire(self.account, self.group_id, endpoint, low_priority=endpoint == 'detail')
+        self.rate_limiter.acquire()
+
+    def _accept_response(self, endpoint: str, url: str, params: Optional[Dict[str, Any]], data: Dict[str, Any]):
+        """Speed the rate limiter up after a successful response and journal the response"""
+        self.rate_limiter.on_success()
+        if self.journal:
+            self.journal.record(endpoint, url, params, data)
+
+    def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None, endpoint: str = 'listing') -> Dict[str, Any]:
+        """
+        Send API request and return JSON response, backing off and retrying when throttled
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            endpoint: Endpoint kind ('listing' or 'detail')
+            
+        Raises:
+            QuotaExceededError: The account's API call budget is used up; detail
+                fetches are refused first when it runs low
+        """
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                # Every HTTP attempt, including the client's own retries, is a call zsxq counts
+                response = self.http_client.get(url, headers=self.headers, params=params,
+                                                before_attempt=lambda: self._charge_attempt(endpoint))
+                throttled = response.status_code == 429
+                if not throttled:
+                    response.raise_for_status()
+                    data = decode_json(response.content)
+                    throttled = self._is_throttled(data)
+            except requests.RequestException as e:
+                logger.error(f"API request failed: {e}")
+                raise
+            if not throttled:
+                self._accept_response(endpoint, url, params, data)
+                return data
+            self.rate_limiter.on_throttle()
+            logger.warning(f"Request throttled (attempt {attempt + 1}): {url}")
+        # Out of retries: surface a 429 as an error, a throttle code as the response itself
+        response.raise_for_status()
+        return data
+
+    @staticmethod
+    def _format_end_time(dt_object: datetime) -> str:
+        """Format a topic create time as the `end_time` pagination cursor"""
+        formatted_time = dt_object.strftime("%Y-%m-%dT%H:%M:%S")
+        milliseconds = f".{dt_object.microsecond // 1000:03d}"
+        timezone_offset = dt_object.strftime("%z") or "+0800"
+        return f"{formatted_time}{milliseconds}{timezone_offset}"
+
+    @staticmethod
+    def _to_watermark(value) -> Optional[datetime]:
+        """
+        Convert a saved `update_time` into a timezone-aware watermark
         
-    def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Send API request and return JSON response"""
+        Args:
+            value: ISO formatted string or datetime, naive values are taken as local time
+            
+        Returns:
+            datetime: The watermark, None if missing or unparseable
+        """
+        if not value:
+            return None
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"API request failed: {e}")
-            raise
+            watermark = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        except ValueError as e:
+            logger.error(f"Invalid watermark {value}: {e}")
+            return None
+        return watermark if watermark.tzinfo else watermark.astimezone()
 
-    def get_topic_detail(self, topic_id: str) -> Optional[Topic]:
-        """Get detailed information for a single topic"""
-        url = f"{self.base_url}/topics/{topic_id}/info"
+    @staticmethod
+    def _is_before_watermark(create_time: datetime, watermark: Optional[datetime]) -> bool:
+        """Check whether a topic was created at or before the watermark"""
+        if watermark is None:
+            return False
+        if create_time.tzinfo is None:
+            create_time = create_time.astimezone()
+        return create_time <= watermark
+
+    def _parse_home_page(self, topics_data: List[Dict[str, Any]], last_topic_id: Optional[str], watermark: Optional[datetime] = None) -> Tuple[List[Topic], bool, Optional[Topic]]:
+        """
+        Parse one page of home topics
+        
+        Args:
+            topics_data: Raw topics of the page
+            last_topic_id: Last crawled topic ID
+            watermark: Create time of the last crawled topic
+            
+        Returns:
+            tuple: (new topics, whether the last crawled topic was found, oldest topic of the page)
+        """
+        current_batch = []
+        oldest_topic = None
+        for topic_data in topics_data:
+            try:
+                topic = topic_from_dict(topic_data)
+                # If we find the last processed topic ID, stop processing
+                if last_topic_id and topic.topic_id == last_topic_id:
+                    logger.info(f"Found already processed topic ID: {topic.topic_id} for group {self.group_name}, stopping")
+                    return current_batch, True, oldest_topic
+                # Also stop at the time watermark in case the last topic was deleted,
+                # pinned topics are skipped since they are listed out of time order
+                if not topic.sticky and self._is_before_watermark(topic.create_time, watermark):
+                    logger.info(f"Reached watermark {watermark} at topic ID: {topic.topic_id} for group {self.group_name}, stopping")
+                    return current_batch, True, oldest_topic
+                
+                current_batch.append(topic)
+                # Home listings carry full topics, keep them for later detail lookups
+                self.topic_cache.put(topic.topic_id, topic_data)
+                
+                # Record the oldest topic for next query
+                if not oldest_topic or topic.create_time < oldest_topic.create_time:
+                    oldest_topic = topic
+                    
+            except Exception as e:
+                logger.error(f"Failed to process topic data: {str(e)}")
+                continue
+        return current_batch, False, oldest_topic
+
+    def _parse_digest_page(self, topics_data: List[Dict[str, Any]], last_topic_id: Optional[str], watermark: Optional[datetime] = None) -> Tuple[List[SimpleTopic], bool]:
+        """
+        Parse one page of digest topics
+        
+        Args:
+            topics_data: Raw topics of the page
+            last_topic_id: Last crawled topic ID
+            watermark: Create time of the last crawled topic
+            
+        Returns:
+            tuple: (new topics whose details still need fetching, whether the last crawled topic was found)
+        """
+        simple_topics = []
+        for topic_data in topics_data:
+            try:
+                topic = simple_topic_from_dict(topic_data)
+                # If we find the last processed topic ID, stop processing
+                if last_topic_id and topic.topic_id == last_topic_id:
+                    logger.info(f"Found already processed digest topic ID: {topic.topic_id} for group {self.group_name}, stopping")
+                    return simple_topics, True
+                # Also stop at the time watermark in case the last topic was deleted or un-digested
+                if self._is_before_watermark(topic.create_time, watermark):
+                    logger.info(f"Reached watermark {watermark} at digest topic ID: {topic.topic_id} for group {self.group_name}, stopping")
+                    return simple_topics, True
+                simple_topics.append(topic)
+            except Exception as e:
+                logger.error(f"Failed to process topic data: {str(e)}")
+                continue
+        return simple_topics, False
+
+    def _home_request(self, end_time: Optional[str] = None, count: int = 20) -> Tuple[str, Dict[str, Any]]:
+        """URL and query parameters of a home listing page, ending before `end_time` if given"""
+        params = {
+            'scope': 'all',
+            'count': count
+        }
+        if end_time:
+            params['end_time'] = end_time
+        return f"{self.base_url}/groups/{self.group_id}/topics", params
+
+    def _digest_request(self, index: Optional[str] = None, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc') -> Tuple[str, Dict[str, Any]]:
+        """URL and query parameters of a digest listing page, starting at cursor `index` if given"""
+        params = {
+            'count': count,
+            'sort': sort,
+            'direction': direction
+        }
+        if index is not None:
+            params['index'] = index
+        return f"{self.base_url}/groups/{self.group_id}/topics/digests", params
+
+    def _read_home_listing(self, data: Dict[str, Any], last_topic_id: Optional[str], watermark: Optional[datetime]) -> Tuple[List[Topic], Optional[str]]:
+        """
+        Parse a home listing response and decide where crawling goes next
+        
+        Returns:
+            tuple: (new topics of the page, `end_time` cursor of the next page, None once the listing is done)
+
+        Raises:
+            CrawlIncompleteError: The response is an API error, e.g. a throttle code still left after retrying
+        """
+        if not data.get('succeeded'):
+            raise CrawlIncompleteError(f"API error: {data}")
+        topics_data = data.get('resp_data', {}).get('topics', [])
+        if not topics_data:
+            logger.info(f"No more topics for group {self.group_name}")
+            return [], None
+        current_batch, found_last_topic, oldest_topic = self._parse_home_page(topics_data, last_topic_id, watermark)
+        # Stop if we found the last topic or have no cursor for the next page
+        if found_last_topic or not oldest_topic:
+            return current_batch, None
+        # Use the oldest topic's time for next query
+        return current_batch, self._format_end_time(oldest_topic.create_time)
+
+    def _read_digest_listing(self, data: Dict[str, Any], last_topic_id: Optional[str], watermark: Optional[datetime]) -> Tuple[List[SimpleTopic], Optional[str]]:
+        """
+        Parse a digest listing response and decide where crawling goes next
+        
+        Returns:
+            tuple: (new topics whose details still need fetching, `index` cursor of the next page, None once the listing is done)
+
+        Raises:
+            CrawlIncompleteError: The response is an API error, e.g. a throttle code still left after retrying
+        """
+        if not data.get('succeeded'):
+            raise CrawlIncompleteError(f"API error: {data}")
+        index = data.get('resp_data', {}).get('index')
+        topics_data = data.get('resp_data', {}).get('topics', [])
+        if not topics_data:
+            logger.info(f"No more digest topics for group {self.group_name}")
+            return [], None
+        simple_topics, found_last_topic = self._parse_digest_page(topics_data, last_topic_id, watermark)
+        if not index:
+            logger.info(f"No more digest topics for group {self.group_name}")
+        # Stop if we found the last topic or no more pages
+        return simple_topics, index if index and not found_last_topic else None
+
+    @staticmethod
+    def _is_unavailable_status(status: int) -> bool:
+        """Whether an HTTP error status refuses a topic for good, unlike throttling and server errors"""
+        return 400 <= status < 500 and status != 429
+
+    def _read_topic_detail(self, topic_id: str, data: Dict[str, Any]) -> Optional[Topic]:
+        """
+        Decode a topic detail response and cache the topic
+        
+        Returns:
+            Topic: The topic, None if the API refuses it for good (deleted, no permission)
+
+        Raises:
+            CrawlIncompleteError: The response is still a throttle code after retrying
+        """
+        if self._is_throttled(data):
+            raise CrawlIncompleteError(f"Topic detail (ID: {topic_id}) still throttled: {data}")
+        if not data.get('succeeded'):
+            logger.warning(f"Topic detail unavailable (ID: {topic_id}): {data}, skipping")
+            return None
+        topic_data = data['resp_data']['topic']
+        self.topic_cache.put(topic_id, topic_data)
+        return topic_from_dict(topic_data)
+
+    def _cached_topic(self, topic_id: str) -> Optional[Topic]:
+        """Get a topic from the topic cache, None if it is not cached"""
+        cached = self.topic_cache.get(topic_id)
+        return topic_from_dict(cached) if cached else None
+
+    @staticmethod
+    def _available_details(details: List[Optional[Topic]]) -> List[Topic]:
+        """Drop the topics whose details the API refused for good, get_topic_detail logged each of them"""
+        available = [detail for detail in details if detail is not None]
+        if len(available) < len(details):
+            logger.warning(f"Skipped {len(details) - len(available)} of {len(details)} digest topics without details")
+        return available
+
+    @staticmethod
+    def _crawl_result(all_topics: List[Topic]) -> Tuple[List[Topic], Optional[str]]:
+        """Pair crawled topics with the ID to save as last_topic_id, that of the newest topic"""
+        if not all_topics:
+            return [], None
+        return all_topics, max(all_topics, key=lambda x: x.create_time).topic_id
+
+    def _has_new_topics(self, data: Dict[str, Any], last_topic_id, last_topic_create_time) -> bool:
+        """
+        Decide from a probe response whether a full crawl is needed
+        
+        Args:
+            data: First page of a topic listing
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic
+            
+        Returns:
+            bool: False only when the newest listed topic is already crawled
+        """
+        if not data.get('succeeded'):
+            return True
+        watermark = self._to_watermark(last_topic_create_time)
+        topics_data = data.get('resp_data', {}).get('topics', [])
+        for topic_data in topics_data:
+            # Pinned topics are listed out of time order and say nothing about new posts
+            if topic_data.get('sticky'):
+                continue
+            topic = simple_topic_from_dict(topic_data)
+            return not ((last_topic_id and topic.topic_id == last_topic_id) or self._is_before_watermark(topic.create_time, watermark))
+        # An empty group has nothing new, a probe page of only pinned topics is inconclusive
+        return bool(topics_data)
+
+    def has_new_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> bool:
+        """Cheaply check whether home has topics newer than the saved state"""
+        if not last_topic_id and not last_topic_create_time:
+            return True
         try:
-            data = self._make_request(url)
-            if data.get('succeeded'):
-                topic_data = data['resp_data']['topic']
-                return Topic.from_dict(topic_data)
+            data = self._make_request(*self._home_request(count=PROBE_TOPICS_COUNT))
+            return self._has_new_topics(data, last_topic_id, last_topic_create_time)
         except Exception as e:
-            logger.error(f"Failed to get topic detail (ID: {topic_id}): {e}")
-        return None
+            logger.error(f"Failed to probe home topics for group {self.group_name}: {e}")
+            return True
 
-    def get_digest_topics(self, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc', last_topic_id: Optional[str] = None) -> Tuple[List[Topic], Optional[str]]:
+    def has_new_digest_topics(self, last_topic_id=None, last_topic_create_time=None) -> bool:
+        """Cheaply check whether digests have topics newer than the saved state"""
+        if not last_topic_id and not last_topic_create_time:
+            return True
+        try:
+            data = self._make_request(*self._digest_request(count=1))
+            return self._has_new_topics(data, last_topic_id, last_topic_create_time)
+        except Exception as e:
+            logger.error(f"Failed to probe digest topics for group {self.group_name}: {e}")
+            return True
+
+    def get_topic_detail(self, topic_id: str) -> Optional[Topic]:
         """
-        Get digest topics list
+        Get detailed information for a single topic, served from the topic cache when possible
+        
+        Returns:
+            Topic: The topic, None if the API refuses it for good (a 4xx status or an API error code)
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
+            Exception: A transient failure (connection error, server error, throttling), the
+                detail may still be fetched on a later poll
+        """
+        topic = self._cached_topic(topic_id)
+        if topic:
+            return topic
+        try:
+            data = self._make_request(f"{self.base_url}/topics/{topic_id}/info", endpoint='detail')
+        except requests.HTTPError as e:
+            if e.response is None or not self._is_unavailable_status(e.response.status_code):
+                raise
+            logger.warning(f"Topic detail unavailable (ID: {topic_id}): {e}, skipping")
+            return None
+        return self._read_topic_detail(topic_id, data)
+
+    def _fetch_topic_details(self, simple_topics: List[SimpleTopic], concurrency: int) -> List[Topic]:
+        """
+        Fetch details for a page of topics with at most `concurrency` requests in flight
+        
+        Returns:
+            list: Fetched topics in the same order as `simple_topics`, without the ones
+                the API refused for good
+
+        Raises:
+            Exception: A detail failed transiently; the whole page fails rather than being
+                delivered with topics missing
+        """
+        if not simple_topics:
+            return []
+        workers = max(1, min(concurrency, len(simple_topics)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            details = list(executor.map(self.get_topic_detail, [topic.topic_id for topic in simple_topics]))
+        return self._available_details(details)
+
+    def iter_digest_pages(self, index: Optional[str] = None, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc', last_topic_id: Optional[str] = None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> Iterator[Tuple[List[Topic], Optional[str]]]:
+        """
+        Crawl digest topics page by page
         
         Args:
+            index: Pagination cursor to resume from, None to start from the newest topics
             count: Number of topics to fetch per request
             sort: Sort method ('by_create_time')
             direction: Sort direction ('desc' or 'asc')
             last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            concurrency: Max topic detail requests in flight
             
-        Returns:
-            tuple: (topics, last_topic_id)
+        Yields:
+            tuple: (topics of the page, cursor of the next page). The cursor is None on the
+            final page; a crawl aborted by an error ends without yielding a None cursor.
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
         """
-        url = f"{self.base_url}/groups/{self.group_id}/topics/digests"
-        all_topics = []
-        found_last_topic = False
-        next_index = None
+        watermark = self._to_watermark(last_topic_create_time)
         
         while True:
             try:
-                params = {
-                    'count': count,
-                    'sort': sort,
-                    'direction': direction
-                }
-                
-                if next_index is not None:
-                    params['index'] = next_index
-                    
-                logger.info(f"Fetching digest topics for group {self.group_name}, index={next_index}")
-                data = self._make_request(url, params)
-                
-                if not data.get('succeeded'):
-                    break
-                    
-                next_index = data.get('resp_data', {}).get('index')
-                topics_data = data.get('resp_data', {}).get('topics', [])
-                
-                if not topics_data:
-                    logger.info(f"No more digest topics for group {self.group_name}")
-                    break
-                    
-                current_batch = []
-                for topic_data in topics_data:
-                    try:
-                        topic = SimpleTopic.from_dict(topic_data)
-                        # If we find the last processed topic ID, stop processing
-                        if last_topic_id and topic.topic_id == last_topic_id:
-                            logger.info(f"Found already processed digest topic ID: {topic.topic_id} for group {self.group_name}, stopping")
-                            found_last_topic = True
-                            break
-
-                        topic_detail = self.get_topic_detail(topic.topic_id)
-                        if topic_detail:
-                            current_batch.append(topic_detail)
-                    except Exception as e:
-                        logger.error(f"Failed to process topic data: {str(e)}")
-                        continue
-                
-                # Stop if we found the last topic or no new topics in this batch
-                if found_last_topic:
-                    if len(current_batch) > 0:
-                        all_topics.extend(current_batch)
-                    break
-                    
-                # Add this batch to the total list
-                all_topics.extend(current_batch)
-                
-                # Stop if no more pages
-                if not next_index:
-                    logger.info(f"No more digest topics for group {self.group_name}")
-                    break
-                    
-                time.sleep(1)  # Avoid too frequent requests
-                
+                logger.info(f"Fetching digest topics for group {self.group_name}, index={index}")
+                data = self._make_request(*self._digest_request(index, count, sort, direction))
+                simple_topics, index = self._read_digest_listing(data, last_topic_id, watermark)
+                current_batch = self._fetch_topic_details(simple_topics, concurrency)
+            except QuotaExceededError:
+                # Out of budget, let the caller leave its crawl state where it was
+                raise
             except Exception as e:
                 logger.error(f"Failed to get digest topics for group {self.group_name}: {str(e)}")
-                break
-        
-        if not all_topics:
-            return [], None
+                return
             
-        # Get the oldest topic as last_topic_id
-        oldest_topic = max(all_topics, key=lambda x: x.create_time)
-        return all_topics, oldest_topic.topic_id
+            yield current_batch, index
+            if index is None:
+                return
 
-    def crawl_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> Tuple[List[Topic], Optional[str]]:
+    def get_digest_topics(self, count: int = 30, sort: str = 'by_create_time', direction: str = 'desc', last_topic_id: Optional[str] = None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> Tuple[List[Topic], Optional[str]]:
         """
-        Crawl home page topics
+        Get digest topics list
         
         Args:
+            count: Number of topics to fetch per request
+            sort: Sort method ('by_create_time')
+            direction: Sort direction ('desc' or 'asc')
             last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            concurrency: Max topic detail requests in flight
             
         Returns:
             tuple: (topics, last_topic_id)
         """
         all_topics = []
-        end_time = None
-        found_last_topic = False
+        for current_batch, _ in self.iter_digest_pages(count=count, sort=sort, direction=direction, last_topic_id=last_topic_id,
+                                                       last_topic_create_time=last_topic_create_time, concurrency=concurrency):
+            all_topics.extend(current_batch)
+        return self._crawl_result(all_topics)
+
+    def iter_home_pages(self, end_time: Optional[str] = None, last_topic_id=None, last_topic_create_time=None) -> Iterator[Tuple[List[Topic], Optional[str]]]:
+        """
+        Crawl home page topics page by page
+        
+        Args:
+            end_time: Pagination cursor to resume from, None to start from the newest topics
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            
+        Yields:
+            tuple: (topics of the page, cursor of the next page). The cursor is None on the
+            final page; a crawl aborted by an error ends without yielding a None cursor.
+
+        Raises:
+            QuotaExceededError: The account's API call budget ran out
+        """
+        watermark = self._to_watermark(last_topic_create_time)
         
         while True:
             try:
-                url = f"{self.base_url}/groups/{self.group_id}/topics"
-                params = {
-                    'scope': 'all',
-                    'count': 20
-                }
-                if end_time:
-                    params['end_time'] = end_time
-                    
                 logger.info(f"Fetching home topics for group {self.group_name}, end_time={end_time}")
-                data = self._make_request(url, params)
-                
-                topics_data = data.get('resp_data', {}).get('topics', [])
-                if not topics_data:
-                    logger.info(f"No more topics for group {self.group_name}")
-                    break
-                    
-                current_batch = []
-                oldest_topic = None
-                
-                for topic_data in topics_data:
-                    try:
-                        topic = Topic.from_dict(topic_data)
-                        # If we find the last processed topic ID, stop processing
-                        if last_topic_id and topic.topic_id == last_topic_id:
-                            logger.info(f"Found already processed topic ID: {topic.topic_id} for group {self.group_name}, stopping")
-                            found_last_topic = True
-                            break
-                        
-                        current_batch.append(topic)
-                        
-                        # Record the oldest topic for next query
-                        if not oldest_topic or topic.create_time < oldest_topic.create_time:
-                            oldest_topic = topic
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to process topic data: {str(e)}")
-                        continue
-                
-                # Stop if we found the last topic or no new topics in this batch
-                if found_last_topic:
-                    if current_batch:
-                        all_topics.extend(current_batch)
-                    break
-                    
-                # Add this batch to the total list
-                all_topics.extend(current_batch)
-                
-                # Use the oldest topic's time for next query
-                if oldest_topic:
-                    dt_object = oldest_topic.create_time
-                    formatted_time = dt_object.strftime("%Y-%m-%dT%H:%M:%S")
-                    milliseconds = f".{dt_object.microsecond // 1000:03d}"
-                    timezone_offset = dt_object.strftime("%z") or "+0800"
-                    end_time = f"{formatted_time}{milliseconds}{timezone_offset}"
-                
-                time.sleep(1)  # Avoid too frequent requests
-                        
+                data = self._make_request(*self._home_request(end_time))
+                current_batch, end_time = self._read_home_listing(data, last_topic_id, watermark)
+            except QuotaExceededError:
+                # Out of budget, let the caller leave its crawl state where it was
+                raise
             except Exception as e:
                 logger.error(f"Error while crawling content for group {self.group_name}: {str(e)}")
-                break
+                return
+            
+            yield current_batch, end_time
+            if end_time is None:
+                return
+
+    def crawl_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> Tuple[List[Topic], Optional[str]]:
+        """
+        Crawl home page topics
         
-        if not all_topics:
-            return [], None            
-        # Get the oldest topic as last_topic_id
-        oldest_overall = max(all_topics, key=lambda x: x.create_time)
-        return all_topics, oldest_overall.topic_id
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic, crawling also stops at topics not newer than it
+            
+        Returns:
+            tuple: (topics, last_topic_id)
+        """
+        all_topics = []
+        for current_batch, _ in self.iter_home_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time):
+            all_topics.extend(current_batch)
+        return self._crawl_result(all_topics)
+
+    def stream_home_topics(self, last_topic_id=None, last_topic_create_time=None) -> Iterator[Topic]:
+        """
+        Stream new home topics as soon as each page is fetched
+        
+        Topics of a page are yielded oldest first. Pages are still fetched newest
+        first, so on a multi-page catch-up an earlier page holds newer topics.
+        
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic
+
+        Raises:
+            CrawlIncompleteError: The listing failed before its last page, after the
+                topics of the pages fetched so far were yielded
+            QuotaExceededError: The account's API call budget ran out part way
+        """
+        completed = False
+        for current_batch, cursor in self.iter_home_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time):
+            yield from sorted(current_batch, key=lambda x: x.create_time)
+            completed = cursor is None
+        if not completed:
+            raise CrawlIncompleteError(f"Home listing of group {self.group_name} stopped before its last page")
+
+    def stream_digest_topics(self, last_topic_id=None, last_topic_create_time=None, concurrency: int = DETAIL_FETCH_CONCURRENCY) -> Iterator[Topic]:
+        """
+        Stream new digest topics as soon as each page is fetched
+        
+        Topics of a page are yielded oldest first. Pages are still fetched newest
+        first, so on a multi-page catch-up an earlier page holds newer topics.
+        
+        Args:
+            last_topic_id: Last crawled topic ID
+            last_topic_create_time: Create time of the last crawled topic
+            concurrency: Max topic detail requests in flight
+
+        Raises:
+            CrawlIncompleteError: The listing failed before its last page, after the
+                topics of the pages fetched so far were yielded
+            QuotaExceededError: The account's API call budget ran out part way
+        """
+        completed = False
+        for current_batch, cursor in self.iter_digest_pages(last_topic_id=last_topic_id, last_topic_create_time=last_topic_create_time, concurrency=concurrency):
+            yield from sorted(current_batch, key=lambda x: x.create_time)
+            completed = cursor is None
+        if not completed:
+            raise CrawlIncompleteError(f"Digest listing of group {self.group_name} stopped before its last page")
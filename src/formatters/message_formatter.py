@@ -4,21 +4,27 @@ Format messages for Telegram HTML mode
 import re
 import warnings
 from datetime import datetime
+from functools import lru_cache
 from html import escape
-from typing import List
+from typing import TYPE_CHECKING, List
 from urllib.parse import unquote
 
-from bs4 import MarkupResemblesLocatorWarning
+from ..crawlers.models import Topic
 
-# 忽略 Beautiful Soup 的 URL 警告
-warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
+if TYPE_CHECKING:
+    from bs4 import Tag
 
-from bs4 import BeautifulSoup, Tag
 
-from ..crawlers.models import Topic
+@lru_cache(maxsize=None)
+def _bs4():
+    """Import Beautiful Soup on first use, it is slow to import and only needed once a message is formatted"""
+    import bs4
+    # 忽略 Beautiful Soup 的 URL 警告
+    warnings.filterwarnings("ignore", category=bs4.MarkupResemblesLocatorWarning)
+    return bs4
 
 
-def get_attr_safe(tag: Tag, attr: str) -> str:
+def get_attr_safe(tag: 'Tag', attr: str) -> str:
     """安全地获取标签属性"""
     if hasattr(tag, 'attrs'):
         value = tag.attrs.get(attr, '')
@@ -32,19 +38,20 @@ def handle_link(text: str) -> str:
     if not text:
         return text
         
-    soup = BeautifulSoup(text, "html.parser")
+    bs4 = _bs4()
+    soup = bs4.BeautifulSoup(text, "html.parser")
 
     # 处理@提及
     mentions = soup.find_all('e', attrs={'type': 'mention'})
     for mention in mentions:
-        if isinstance(mention, Tag):
+        if isinstance(mention, bs4.Tag):
             mention_name = get_attr_safe(mention, 'title')
             mention.replace_with(soup.new_string(f"@{mention_name}"))
 
     # 处理网页链接
     links = soup.find_all('e', attrs={'type': 'web'})
     for link in links:
-        if isinstance(link, Tag):
+        if isinstance(link, bs4.Tag):
             title = unquote(get_attr_safe(link, 'title'))
             href = unquote(get_attr_safe(link, 'href'))
             new_a_tag = soup.new_tag('a', href=href)
@@ -54,7 +61,7 @@ def handle_link(text: str) -> str:
     # 处理文本加粗
     bold_texts = soup.find_all('e', attrs={'type': 'text_bold'})
     for bold in bold_texts:
-        if isinstance(bold, Tag):
+        if isinstance(bold, bs4.Tag):
             title = unquote(get_attr_safe(bold, 'title'))
             new_tag = soup.new_tag('b')
             new_tag.string = title
@@ -98,13 +105,14 @@ class TelegramFormatter:
         
         # Extract and format hashtags first
         text = topic.talk.text
-        soup = BeautifulSoup(text, "html.parser")
+        bs4 = _bs4()
+        soup = bs4.BeautifulSoup(text, "html.parser")
         hashtags = soup.find_all('e', attrs={'type': 'hashtag'})
         tags = ["#知识星球", "#"+topic.group.name.replace(' ', '_')]
         tags.append("#"+crawl_type)
         if hashtags:
             for tag in hashtags:
-                if isinstance(tag, Tag):
+                if isinstance(tag, bs4.Tag):
                     tag_name = unquote(get_attr_safe(tag, 'title'))
                     tag_name = tag_name.strip("#")
                     tags.append(f"#{tag_name.replace(' ', '_')}")
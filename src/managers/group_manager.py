@@ -1,41 +1,90 @@
 import os
 import json
-from typing import Optional, Dict, List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Dict, List
 from datetime import datetime
-import requests
 from src.models.group import Group
+from src.utils.http_client import HttpClient
 from src.utils.logger import setup_logger
-from config import GROUP_CONFIG_MANAGER
+from src.utils.quota_manager import QuotaExceededError, QuotaManager
+from src.utils.response_journal import ResponseJournal
+from config import (
+    ACCOUNT_CONFIG_MANAGER,
+    GROUP_CACHE_DIR,
+    GROUP_CACHE_TTL_HOURS,
+    GROUP_CONFIG_MANAGER,
+    GROUP_LOAD_CONCURRENCY,
+    GROUP_REFRESH_RETRY_BASE_SECONDS,
+    GROUP_REFRESH_RETRY_MAX_SECONDS,
+    JOURNAL_ENABLED,
+    ZSXQ_API_BASE_URL,
+)
 
 logger = setup_logger(__name__)
 
 class GroupManager:
     _instance = None
     _initialized = False
+    # Crawlers running on scheduler worker threads may build the first instance concurrently
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(GroupManager, cls).__new__(cls)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(GroupManager, cls).__new__(cls)
         return cls._instance
 
     def __init__(self):
-        if not self._initialized:
-            self.cookie = os.getenv('ZSXQ_COOKIE')
-            self.base_url = 'https://api.zsxq.com/v2'
-            self._groups: Dict[int, Group] = {}
-            self._session = requests.Session()
-            self._session.headers.update({
-                'Cookie': "zsxq_access_token=" + self.cookie,
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-            })
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.base_url = ZSXQ_API_BASE_URL
+            self._groups: Dict[str, Group] = {}
+            # Raw group info responses with their fetch time, as persisted to the cache
+            self._responses: Dict[str, Dict[str, Any]] = {}
+            # Background refresh: when each group is next due and how often it failed in a row
+            self._refresh_due: Dict[str, float] = {}
+            self._refresh_failures: Dict[str, int] = {}
+            self._refresh_stop = threading.Event()
+            self._refresher: Optional[threading.Thread] = None
+            self._http_client = HttpClient()
+            # Only the disk cache here, network loading is left to initialize_groups or the refresher
+            self.load_cached_groups()
             self._initialized = True
-            self.initialize_groups()
+
+    @staticmethod
+    def _cache_path(group_id) -> str:
+        return os.path.join(GROUP_CACHE_DIR, f"{group_id}.json")
+
+    def load_cached_groups(self) -> int:
+        """
+        Load the configured groups from the disk cache, however old, without touching the network
+
+        Returns:
+            int: Number of groups loaded
+        """
+        loaded = 0
+        for group_id in GROUP_CONFIG_MANAGER.get_group_configs():
+            if str(group_id) not in self._groups and self.load_group_from_file(self._cache_path(group_id)):
+                loaded += 1
+        return loaded
 
     def initialize_groups(self) -> bool:
-        """Initialize groups from configuration"""
+        """
+        Initialize groups from configuration
+
+        Groups with a fresh disk cache entry are served from the cache, the
+        rest are fetched concurrently. A group whose fetch fails falls back to
+        its stale cache entry if it has one.
+        """
         try:
             logger.info("Initializing groups from configuration...")
-            success = True
             
             # Get all configured group IDs
             group_ids = GROUP_CONFIG_MANAGER.get_group_configs()
@@ -43,15 +92,29 @@ class GroupManager:
                 logger.warning("No groups configured")
                 return False
             
-            # Load group info for each configured group
-            for group_id in group_ids:
-                group = self.get_group_info(group_id)
-                if group:
-                    logger.info(f"Successfully loaded group: {group.name} (ID: {group_id})")
-                else:
-                    logger.error(f"Failed to load group ID: {group_id}")
-                    success = False
+            self.load_cached_groups()
+            now = time.time()
+            missing = [group_id for group_id in group_ids if self._refresh_due.get(str(group_id), 0) <= now]
+            if len(missing) < len(group_ids):
+                logger.info(f"Loaded {len(group_ids) - len(missing)} groups from cache")
+            
+            if missing:
+                # Set up the quota store here rather than racing to create it on the workers
+                QuotaManager()
+                with ThreadPoolExecutor(max_workers=max(1, min(GROUP_LOAD_CONCURRENCY, len(missing)))) as executor:
+                    groups = list(executor.map(self.get_group_info, missing))
+                for group_id, group in zip(missing, groups):
+                    if group:
+                        logger.info(f"Successfully loaded group: {group.name} (ID: {group_id})")
+                        self.save_group_to_file(group_id)
+                    elif str(group_id) in self._groups:
+                        logger.warning(f"Failed to fetch group ID: {group_id}, using stale cached info")
+                    else:
+                        logger.error(f"Failed to load group ID: {group_id}")
+                    if not group:
+                        self._schedule_retry(group_id)
             
+            success = all(str(group_id) in self._groups for group_id in group_ids)
             if success:
                 logger.info(f"Successfully initialized {len(self._groups)} groups")
             else:
@@ -66,8 +129,18 @@ class GroupManager:
     def get_group_info(self, group_id: int) -> Optional[Group]:
         """Get group information from API"""
         try:
+            account = ACCOUNT_CONFIG_MANAGER.get_account_for_group(group_id)
+            if not account:
+                logger.error(f"No account configured for group ID {group_id}")
+                return None
             url = f"{self.base_url}/groups/{group_id}"
-            response = self._session.get(url)
+            try:
+                # Count every attempt, the client's retries are calls too
+                response = self._http_client.get(url, headers=account.get_headers(),
+                                                 before_attempt=lambda: QuotaManager().acquire(account, group_id, 'group'))
+            except QuotaExceededError:
+                logger.error(f"API call budget of account {account.name} exhausted, cannot load group ID {group_id}")
+                return None
             
             if response.status_code != 200:
                 logger.error(f"Failed to get group info for ID {group_id}: {response.status_code}")
@@ -77,18 +150,94 @@ class GroupManager:
             if not data.get('succeeded'):
                 logger.error(f"API error for group ID {group_id}: {data}")
                 return None
+            if JOURNAL_ENABLED:
+                ResponseJournal.for_group(group_id).record('group', url, None, data)
             
             group = Group.from_dict(data)
-            self._groups[group_id] = group
+            self._groups[str(group_id)] = group
+            self._responses[str(group_id)] = {'fetched_at': time.time(), 'response': data}
+            self._schedule_refresh(group_id)
             return group
                 
         except Exception as e:
             logger.error(f"Error getting group info for ID {group_id}: {str(e)}")
             return None
 
+    def _schedule_refresh(self, group_id):
+        """Make the group due for refresh once its cached info expires"""
+        key = str(group_id)
+        self._refresh_failures.pop(key, None)
+        self._refresh_due[key] = self._responses[key]['fetched_at'] + GROUP_CACHE_TTL_HOURS * 3600
+
+    def _schedule_retry(self, group_id) -> float:
+        """
+        Back off a group whose info could not be fetched
+
+        Returns:
+            float: Seconds until the next attempt
+        """
+        key = str(group_id)
+        failures = self._refresh_failures.get(key, 0) + 1
+        self._refresh_failures[key] = failures
+        delay = min(GROUP_REFRESH_RETRY_MAX_SECONDS, GROUP_REFRESH_RETRY_BASE_SECONDS * 2 ** (failures - 1))
+        delay = random.uniform(delay / 2, delay)
+        self._refresh_due[key] = time.time() + delay
+        return delay
+
+    def refresh_due_groups(self) -> int:
+        """
+        Refetch the configured groups whose cached info expired or whose retry is due
+
+        Readers keep getting the cached Group until the new one replaces it.
+
+        Returns:
+            int: Number of groups refreshed
+        """
+        refreshed = 0
+        for group_id in GROUP_CONFIG_MANAGER.get_group_configs():
+            if self._refresh_stop.is_set():
+                break
+            if self._refresh_due.get(str(group_id), 0) > time.time():
+                continue
+            if self.get_group_info(group_id):
+                self.save_group_to_file(group_id)
+                refreshed += 1
+            else:
+                delay = self._schedule_retry(group_id)
+                logger.warning(f"Failed to refresh group {self.get_group_name(group_id)}, "
+                               f"retrying in {delay:.0f}s (attempt {self._refresh_failures[str(group_id)]})")
+        return refreshed
+
+    def _refresh_loop(self):
+        while not self._refresh_stop.is_set():
+            try:
+                refreshed = self.refresh_due_groups()
+                if refreshed:
+                    logger.info(f"Refreshed info of {refreshed} groups")
+            except Exception as e:
+                logger.error(f"Error refreshing groups: {str(e)}")
+            next_due = min(self._refresh_due.values(), default=time.time() + GROUP_REFRESH_RETRY_MAX_SECONDS)
+            self._refresh_stop.wait(min(max(next_due - time.time(), 1), GROUP_REFRESH_RETRY_MAX_SECONDS))
+
+    def start_refresher(self):
+        """Keep group info up to date from a background thread, refetching it as the cache expires"""
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name='group-refresher', daemon=True)
+        self._refresher.start()
+        logger.info("Started group info refresher")
+
+    def stop_refresher(self):
+        """Stop the background refresher, waiting for an in-flight refresh to finish"""
+        self._refresh_stop.set()
+        if self._refresher:
+            self._refresher.join()
+            self._refresher = None
+
     def get_group(self, group_id: int) -> Optional[Group]:
         """Get group from cache"""
-        return self._groups.get(group_id)
+        return self._groups.get(str(group_id))
 
     def get_group_name(self, group_id: int) -> str:
         """Get group name from cache, fallback to ID if not found"""
@@ -102,38 +251,66 @@ class GroupManager:
     def clear_cache(self):
         """Clear group cache"""
         self._groups.clear()
+        self._responses.clear()
+        self._refresh_due.clear()
+        self._refresh_failures.clear()
 
     def close(self):
-        """Close requests session"""
-        if self._session:
-            self._session.close()
-            self._session = None
+        """Release the manager; the shared HTTP client stays open for other users"""
+        self.stop_refresher()
+        if self._http_client:
+            self._http_client = None
             self._initialized = False
             GroupManager._instance = None
 
-    def save_group_to_file(self, group_id: int, filepath: str):
-        """Save group info to file"""
-        group = self.get_group(group_id)
-        if not group:
+    def save_group_to_file(self, group_id: int, filepath: Optional[str] = None):
+        """
+        Save the group's raw info response and its fetch time to file
+
+        Args:
+            group_id: Group ID
+            filepath: Target file, None for the group's entry in GROUP_CACHE_DIR
+        """
+        entry = self._responses.get(str(group_id))
+        if not entry:
             logger.error(f"Group {self.get_group_name(group_id)} not found in cache")
             return
         
+        filepath = filepath or self._cache_path(group_id)
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(group.__dict__, f, ensure_ascii=False, indent=2, default=str)
-            logger.info(f"Saved group {group.name} info to {filepath}")
+            os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+            temp_file = f"{filepath}.{os.getpid()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_file, filepath)
+            logger.info(f"Saved group {self.get_group_name(group_id)} info to {filepath}")
         except Exception as e:
             logger.error(f"Error saving group {self.get_group_name(group_id)} info to file: {str(e)}")
 
-    def load_group_from_file(self, filepath: str) -> Optional[Group]:
-        """Load group info from file"""
+    def load_group_from_file(self, filepath: str, max_age_seconds: Optional[float] = None) -> Optional[Group]:
+        """
+        Load group info saved by save_group_to_file
+
+        Args:
+            filepath: File to load
+            max_age_seconds: Ignore the file if the info was fetched longer ago, None to accept any age
+
+        Returns:
+            Group: The loaded group, None if the file is missing, too old or invalid
+        """
+        if not os.path.exists(filepath):
+            return None
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                group = Group(**data)
-                self._groups[group.group_id] = group
-                logger.info(f"Loaded group {group.name} from file {filepath}")
-                return group
+                entry = json.load(f)
+            if max_age_seconds is not None and time.time() - entry['fetched_at'] > max_age_seconds:
+                return None
+            group = Group.from_dict(entry['response'])
+            self._groups[str(group.group_id)] = group
+            self._responses[str(group.group_id)] = entry
+            self._schedule_refresh(group.group_id)
+            logger.info(f"Loaded group {group.name} from file {filepath}")
+            return group
         except Exception as e:
             logger.error(f"Error loading group info from file {filepath}: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
@@ -1,7 +1,9 @@
+import copy
 from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-import re
+
+from src.utils.time_parser import parse_zsxq_time
 
 @dataclass
 class ImageSize:
@@ -260,7 +262,7 @@ class Group:
     @staticmethod
     def _parse_datetime(dt_str: str) -> datetime:
         """
-        统一处理各种格式的日期时间字符串
+        统一处理各种格式的日期时间字符串，格式错误时抛出 ValueError
         支持的格式：
         - 2023-03-15T09:59:46.346+0800
         - 2023-03-15T09:59:46+0800
@@ -269,30 +271,13 @@ class Group:
         """
         if not dt_str:
             return None
-
-        try:
-            # 移除毫秒部分
-            if '.' in dt_str:
-                dt_str = dt_str.split('.')[0]
-            
-            # 处理时区
-            if dt_str.endswith('Z'):
-                dt_str = dt_str.replace('Z', '+00:00')
-            elif not dt_str.endswith('+00:00'):
-                # 确保时区格式为 +HH:MM
-                tz_match = re.search(r'([+-]\d{4})$', dt_str)
-                if tz_match:
-                    tz = tz_match.group(1)
-                    dt_str = dt_str.replace(tz, f"{tz[:3]}:{tz[3:]}")
-            
-            return datetime.fromisoformat(dt_str)
-        except Exception as e:
-            raise ValueError(f"Invalid datetime format: {dt_str}") from e
+        return parse_zsxq_time(dt_str)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Group':
         """Create a Group instance from API response data"""
-        group_data = data['resp_data']['group']
+        # Nested from_dict calls convert in place, keep the caller's response intact
+        group_data = copy.deepcopy(data['resp_data']['group'])
         
         # 统一处理所有日期时间字段
         datetime_fields = [
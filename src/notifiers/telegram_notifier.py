@@ -3,19 +3,15 @@ Telegram notification handler for the 知识星球 crawler.
 """
 import asyncio
 import mimetypes
+import threading
 from pathlib import Path
 import os
 from typing import Optional, List
 
-from telegram import Bot, InputMediaDocument, InputMediaPhoto
-from telegram.error import TelegramError
-from telegram.constants import ParseMode
-
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 
 from ..utils.file_downloader import FileDownloader
 from src.utils.logger import setup_logger
-import aiohttp
 
 logger = setup_logger(__name__)
 
@@ -26,17 +22,24 @@ class TelegramNotifier:
         self.chat_id = TELEGRAM_CHAT_ID
         if not self.bot_token or not self.chat_id:
             raise ValueError("TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be set")
-        self.bot = Bot(token=self.bot_token)
+        self._bot = None
         self._loop = None
+        # Crawl workers share one notifier, sends run one at a time on its own loop
+        self._send_lock = threading.Lock()
+
+    @property
+    def bot(self):
+        """The python-telegram-bot client, imported and created on first use to keep startup fast"""
+        if self._bot is None:
+            from telegram import Bot
+            self._bot = Bot(token=self.bot_token)
+        return self._bot
 
     def _get_loop(self):
-        """Get or create event loop"""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop
+        """Get or create the notifier's event loop"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop
 
     async def _send_message(self, text: str, thread_id: Optional[int] = None, parse_mode: str = 'HTML') -> bool:
         """Send a message to Telegram"""
@@ -49,6 +52,7 @@ class TelegramNotifier:
         if thread_id:
             data["message_thread_id"] = thread_id
             
+        import aiohttp
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(url, json=data) as response:
@@ -75,6 +79,7 @@ class TelegramNotifier:
         if thread_id:
             data["message_thread_id"] = thread_id
             
+        import aiohttp
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(url, json=data) as response:
@@ -99,9 +104,13 @@ class TelegramNotifier:
             images (list): List of images
             files (list): List of files
             parse_mode (str): Message parse mode ('HTML' or 'Markdown')
+
+        Returns:
+            bool: True if the message was sent
         """
         if not self.bot or not self.chat_id:
-            return
+            return False
+        from telegram.error import TelegramError
         
         if len(text) > 4096 :
             logger.warning(f"Text length is greater than 4096 characters, truncating to 4096 characters")
@@ -155,37 +164,42 @@ class TelegramNotifier:
                     connect_timeout=60,  # 设置连接超时
                     pool_timeout=60  # 设置连接池超时
                 )
+                return True
                 
         except TelegramError as e:
-            logger.error(f"Failed to send Telegram message: {e}, text:{len(text)}, images:{len(images)}, files:{len(files)}")
+            logger.error(f"Failed to send Telegram message: {e}, text:{len(text)}, images:{len(images or [])}, files:{len(files or [])}")
+            return False
         except Exception as e:
             logger.error(f"Unexpected error while sending Telegram message: {e}")
+            return False
         finally:
             FileDownloader.cleanup_temp_files()
             
     def send_message_with_media(self, text, thread_id=None, images=None, files=None, parse_mode='HTML'):
-        """Synchronous wrapper for send_message_with_media"""
-        loop = self._get_loop()
-        return loop.run_until_complete(
-            self._send_message_with_media(text, thread_id, images, files, parse_mode)
-        )
+        """Synchronous wrapper for send_message_with_media, returns True if the message was sent"""
+        with self._send_lock:
+            loop = self._get_loop()
+            return loop.run_until_complete(
+                self._send_message_with_media(text, thread_id, images, files, parse_mode)
+            )
         
-    def send_message_sync(self, text: str, thread_id: Optional[str] = None, images: Optional[List[str]] = None, files: Optional[List[str]] = None, parse_mode: str = ParseMode.HTML) -> bool:
+    def send_message_sync(self, text: str, thread_id: Optional[str] = None, images: Optional[List[str]] = None, files: Optional[List[str]] = None, parse_mode: str = 'HTML') -> bool:
         """Synchronous method to send message"""
         try:
-            loop = self._get_loop()
-            return loop.run_until_complete(
-                self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=text,
-                    parse_mode=parse_mode,
-                    message_thread_id=thread_id,
-                    read_timeout=60,  # 设置读取超时
-                    write_timeout=60,  # 设置写入超时
-                    connect_timeout=60,  # 设置连接超时
-                    pool_timeout=60  # 设置连接池超时
+            with self._send_lock:
+                loop = self._get_loop()
+                return loop.run_until_complete(
+                    self.bot.send_message(
+                        chat_id=self.chat_id,
+                        text=text,
+                        parse_mode=parse_mode,
+                        message_thread_id=thread_id,
+                        read_timeout=60,  # 设置读取超时
+                        write_timeout=60,  # 设置写入超时
+                        connect_timeout=60,  # 设置连接超时
+                        pool_timeout=60  # 设置连接池超时
+                    )
                 )
-            )
         except Exception as e:
             logger.error(f"Failed to send message: {e}")
             return False
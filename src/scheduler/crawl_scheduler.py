@@ -1,16 +1,33 @@
+import heapq
 import time
 import logging
-from datetime import datetime
-from typing import Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from src.crawlers.zsxq_crawler import ZsxqCrawler
 from src.notifiers.telegram_notifier import TelegramNotifier
 from src.utils.group_config import GroupConfigManager, GroupConfig
 from state_manager import CrawlType, StateManager
-from src.formatters.message_formatter import TelegramFormatter
 from src.managers.group_manager import GroupManager
+from src.scheduler.delivery_pipeline import DeliveryPipeline
+from src.utils.http_client import HttpClient
+from src.utils.group_lease import GroupLeaseManager
 from src.utils.logger import setup_logger
-from config import CRAWL_INTERVAL_MINUTES, TELEGRAM_TOPIC_ERROR_ID
+from src.utils.quota_manager import QuotaExceededError, QuotaManager
+from src.utils.rate_limiter import AdaptiveRateLimiter
+from src.utils.topic_cache import TopicCache
+from config import (
+    ACCOUNT_CONFIG_MANAGER,
+    CRAWL_ACCOUNT_CONCURRENCY,
+    CRAWL_GROUP_CONCURRENCY,
+    CRAWL_GROUP_TIMEOUT_MINUTES,
+    CRAWL_INTERVAL_MINUTES,
+    CRAWL_MAX_INTERVAL_MINUTES,
+    CRAWL_MIN_INTERVAL_MINUTES,
+    CRAWL_RATE_SMOOTHING,
+    TELEGRAM_TOPIC_ERROR_ID,
+)
 
 
 logger = setup_logger(__name__)
@@ -20,40 +37,234 @@ class CrawlScheduler:
         self.group_config_manager = group_config_manager
         self.notifier = TelegramNotifier()
         self.group_manager = GroupManager()
+        # Groups are shared out among scheduler replicas, each polls and delivers only the ones leased to it
+        self.leases = GroupLeaseManager()
+        self.delivery = DeliveryPipeline(self.notifier, leases=self.leases)
         self.running = False
+        self._stopped = False
+        # Long-lived pools, so a timed-out group never holds up the job that gave up on it
+        self._group_executor = ThreadPoolExecutor(max_workers=max(1, CRAWL_GROUP_CONCURRENCY), thread_name_prefix='group')
+        self._home_executor = ThreadPoolExecutor(max_workers=max(1, CRAWL_GROUP_CONCURRENCY), thread_name_prefix='home')
+        # Groups still being processed, possibly by an earlier job that timed them out
+        self._in_flight: Dict[str, Future] = {}
+        self._started_at: Dict[str, float] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._timed_out = set()
+        # Polling schedule of start(): a heap of (next run, group ID), plus each group's
+        # smoothed posting rate (new topics per hour) and the time of its last poll
+        self._schedule: List[Tuple[float, str]] = []
+        self._schedule_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._post_rates: Dict[str, float] = {}
+        self._last_polled: Dict[str, float] = {}
+        self._initial_interval_minutes = CRAWL_INTERVAL_MINUTES
         
-    def crawl_job(self):
-        """Main crawl job that processes all groups"""
-        logger.info(f"Starting scheduled crawl job at {datetime.now()}")
-        try:
-            for group_id in self.group_config_manager.get_group_configs():
-                group_config = self.group_config_manager.get_group_config(group_id)
-                if group_config:
-                    self._process_group(group_config)
-        except Exception as e:
-            logger.error(f"Error in crawl job: {str(e)}")
+    def _log_stats(self):
+        cache_stats = TopicCache().stats()
+        logger.info(f"Topic cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']} entries")
+        if self.leases.enabled:
+            logger.info(f"Replica {self.leases.instance_id} owns {len(self.leases.owned_groups())} groups")
+        outbox_stats = self.delivery.outbox.stats()
+        logger.info(f"Delivery outbox: {outbox_stats['pending']} pending, {outbox_stats['sent']} sent, {outbox_stats['failed']} failed")
+        HttpClient().log_stats()
+        QuotaManager().log_stats()
+        QuotaManager().flush()
+
+    def _take_over(self, group_id: str):
+        """Pick up a group newly leased to this replica, sending what its previous owner left in the outbox"""
+        logger.info(f"Taking over group {self.group_manager.get_group_name(group_id)}")
+        self.delivery.resume(group_id)
+        self._wakeup.set()
+
+    def _submit_group(self, group_config: GroupConfig) -> Optional[Future]:
+        """
+        Queue a group on the group pool
+
+        Returns:
+            Future: Resolves to the number of topics delivered, None if the group is
+                still being processed by an earlier run
+        """
+        group_id = group_config.get_group_id()
+        if group_id in self._in_flight:
+            logger.warning(f"Group {self.group_manager.get_group_name(group_id)} is still being processed by an earlier run, skipping")
+            return None
+        cancel = threading.Event()
+        self._cancel_events[group_id] = cancel
+        future = self._group_executor.submit(self._run_group, group_config, cancel)
+        self._in_flight[group_id] = future
+        future.add_done_callback(lambda _, group_id=group_id: self._group_done(group_id))
+        return future
+
+    def _cancel_timed_out(self, group_ids) -> List[str]:
+        """
+        Cancel the given groups that have run past CRAWL_GROUP_TIMEOUT_MINUTES
+
+        A cancelled group stops after the topic it is sending; callers stop waiting
+        for it right away, so it keeps running in the background until then.
+
+        Returns:
+            list: IDs of the groups cancelled by this call
+        """
+        timeout = CRAWL_GROUP_TIMEOUT_MINUTES * 60
+        now = time.monotonic()
+        cancelled = []
+        for group_id in list(group_ids):
+            started_at = self._started_at.get(group_id)
+            if group_id in self._timed_out or started_at is None or now - started_at <= timeout:
+                continue
+            self._timed_out.add(group_id)
+            self._cancel_events[group_id].set()
+            cancelled.append(group_id)
+            group_name = self.group_manager.get_group_name(group_id)
+            logger.error(f"Group {group_name} timed out after {timeout / 60:g} minutes, cancelling")
             self.notifier.send_message_sync(
-                text=f"❌ Crawl job failed: {str(e)}",
+                text=f"⏱ Processing group {group_name} timed out after {timeout / 60:g} minutes",
                 thread_id=TELEGRAM_TOPIC_ERROR_ID,
                 parse_mode='HTML'
             )
-            
-    def _process_group(self, group_config):
-        """Process a single group"""
+        return cancelled
+
+    def _run_group(self, group_config: GroupConfig, cancel: threading.Event) -> Optional[int]:
+        group_id = group_config.get_group_id()
+        self._started_at[group_id] = time.monotonic()
+        delivered = self._process_group(group_config, cancel)
+        logger.info(f"Processed group {self.group_manager.get_group_name(group_id)} in {time.monotonic() - self._started_at[group_id]:.1f}s")
+        return delivered
+
+    def _group_done(self, group_id: str):
+        self._in_flight.pop(group_id, None)
+        self._started_at.pop(group_id, None)
+        self._cancel_events.pop(group_id, None)
+        self._timed_out.discard(group_id)
+
+    def _next_interval(self, group_id: str, delivered: Optional[int]) -> float:
+        """
+        Update the group's posting rate with the topics delivered by its last poll
+        and derive the interval until its next poll
+
+        The interval is the expected time between two new topics, bounded by
+        CRAWL_MIN_INTERVAL_MINUTES and CRAWL_MAX_INTERVAL_MINUTES.
+
+        Args:
+            group_id: Group ID
+            delivered: Topics delivered by the poll, None if it failed
+
+        Returns:
+            float: Seconds until the next poll
+        """
+        now = time.monotonic()
+        last_polled = self._last_polled.get(group_id)
+        if delivered is not None:
+            # The first poll delivers whatever piled up before startup, it says nothing about the rate
+            if last_polled is not None:
+                observed = delivered * 3600 / max(now - last_polled, 1)
+                previous = self._post_rates.get(group_id, observed)
+                self._post_rates[group_id] = CRAWL_RATE_SMOOTHING * observed + (1 - CRAWL_RATE_SMOOTHING) * previous
+            self._last_polled[group_id] = now
+        rate = self._post_rates.get(group_id)
+        if rate is None:
+            minutes = self._initial_interval_minutes
+        elif rate > 0:
+            minutes = 60 / rate
+        else:
+            minutes = CRAWL_MAX_INTERVAL_MINUTES
+        return max(CRAWL_MIN_INTERVAL_MINUTES, min(CRAWL_MAX_INTERVAL_MINUTES, minutes)) * 60
+
+    def _reschedule(self, group_id: str, due: float, future: Future):
+        """Put a polled group back on the schedule, anchored to its previous due time so the cadence doesn't drift"""
+        interval = self._next_interval(group_id, future.result())
+        rate = self._post_rates.get(group_id)
+        logger.info(f"Next poll of group {self.group_manager.get_group_name(group_id)} in {interval / 60:.1f} minutes"
+                    + (f" ({rate:.2f} new topics/hour)" if rate is not None else ""))
+        with self._schedule_lock:
+            heapq.heappush(self._schedule, (max(due + interval, time.monotonic()), group_id))
+        self._wakeup.set()
+
+    def _account_delay(self, group_id: str) -> float:
+        """
+        Seconds to hold a due group back so one account cannot fill the group pool
+
+        Returns:
+            float: The rest of the account's throttling cooldown, a short retry delay while it
+                already runs CRAWL_ACCOUNT_CONCURRENCY groups, 0 if the group may start now
+        """
+        account = ACCOUNT_CONFIG_MANAGER.get_account_for_group(group_id)
+        if not account:
+            return 0
+        cooldown = AdaptiveRateLimiter.for_key(account.name, account.rate, account.max_rate).cooldown_remaining()
+        if cooldown > 0:
+            logger.info(f"Account {account.name} is backing off, holding group {self.group_manager.get_group_name(group_id)} for {cooldown:.0f}s")
+            return cooldown
+        running = 0
+        for other_id in list(self._in_flight):
+            other = ACCOUNT_CONFIG_MANAGER.get_account_for_group(other_id)
+            if other and other.name == account.name:
+                running += 1
+        # Checked again at the scheduler loop's 5s wake-up while groups are running
+        return 5 if running >= max(1, CRAWL_ACCOUNT_CONCURRENCY) else 0
+
+    def _run_due_groups(self):
+        """Submit every group whose next poll is due and whose account has room for it"""
+        now = time.monotonic()
+        held_back = []
+        while True:
+            with self._schedule_lock:
+                if not self._schedule or self._schedule[0][0] > now:
+                    break
+                due, group_id = heapq.heappop(self._schedule)
+            group_config = self.group_config_manager.get_group_config(group_id)
+            if group_config and not self.leases.owns(group_id):
+                # Leased to another replica, check back about as often as leases change hands
+                with self._schedule_lock:
+                    heapq.heappush(self._schedule, (now + self.leases.ttl / 3, group_id))
+                continue
+            delay = self._account_delay(group_id) if group_config and group_id not in self._in_flight else 0
+            if delay > 0:
+                held_back.append((now + delay, group_id))
+                continue
+            future = self._submit_group(group_config) if group_config else None
+            if future:
+                future.add_done_callback(lambda future, group_id=group_id, due=due: self._reschedule(group_id, due, future))
+            elif group_config:
+                with self._schedule_lock:
+                    heapq.heappush(self._schedule, (now + CRAWL_MIN_INTERVAL_MINUTES * 60, group_id))
+        # Pushed back only now, the loop above would pop them again right away
+        with self._schedule_lock:
+            for entry in held_back:
+                heapq.heappush(self._schedule, entry)
+
+    def _process_group(self, group_config: GroupConfig, cancel: Optional[threading.Event] = None) -> Optional[int]:
+        """
+        Process a single group, crawling its home and digest topics at the same time
+
+        Returns:
+            int: Number of topics delivered, None if processing failed
+        """
         group_id = group_config.get_group_id()
         group_name = self.group_manager.get_group_name(group_id)
         logger.info(f"Processing group: {group_name}")
+        cancel = cancel or threading.Event()
         
         try:
             crawler = ZsxqCrawler(group_id)
             
             # Process home topics if enabled
+            home = None
             if group_config.get_is_crawl_home():
-                self._process_home_topics(crawler, group_config)
+                home = self._home_executor.submit(self._process_home_topics, crawler, group_config, cancel)
             
             # Process digest topics
-            self._process_digest_topics(crawler, group_config)
+            try:
+                delivered = self._process_digest_topics(crawler, group_config, cancel)
+            finally:
+                if home:
+                    delivered_home = home.result()
+            return delivered + (delivered_home if home else 0)
             
+        except QuotaExceededError as e:
+            # Budgets reset on their own, retry at the next poll from the unchanged crawl state
+            logger.warning(f"Stopped processing group {group_name}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error processing group {group_name}: {str(e)}")
             self.notifier.send_message_sync(
@@ -61,113 +272,158 @@ class CrawlScheduler:
                 thread_id=TELEGRAM_TOPIC_ERROR_ID,
                 parse_mode='HTML'
             )
+            return None
             
-    def _process_home_topics(self, crawler, group_config):
-        """Process home topics for a group"""
+    def _process_home_topics(self, crawler, group_config, cancel: threading.Event) -> int:
+        """Crawl new home topics of a group into the delivery pipeline, returning the number of topics queued"""
         group_id = group_config.get_group_id()
         group_name = self.group_manager.get_group_name(group_id)
         home_state = StateManager.get_state(group_id, CrawlType.HOME)
         last_home_id = home_state.get('last_topic_id') if home_state else None
+        last_home_time = home_state.get('update_time') if home_state else None
+        if not crawler.has_new_home_topics(last_home_id, last_home_time):
+            logger.info(f"No new home content for group {group_name}")
+            return 0
         
-        topics, _ = crawler.crawl_home_topics(last_topic_id=last_home_id)
-        if topics:
-            thread_id = group_config.get_thread_id('home')
-            success_count, last_topic_id, last_topic_create_time = self._process_topics(
-                crawler, topics, CrawlType.HOME.value, thread_id
-            )
-            if success_count > 0:
-                StateManager.save_state(group_id, CrawlType.HOME, {
-                    'last_topic_id': last_topic_id,
-                    'update_time': last_topic_create_time.isoformat()
-                })
-                logger.info(f"Successfully forwarded {success_count} home updates for group {group_name}")
+        topics = crawler.stream_home_topics(last_topic_id=last_home_id, last_topic_create_time=last_home_time)
+        thread_id = group_config.get_thread_id('home')
+        queued = self._process_topics(crawler, topics, CrawlType.HOME, thread_id, cancel)
+        if queued > 0:
+            logger.info(f"Queued {queued} home updates of group {group_name} for delivery")
         else:
             logger.info(f"No new home content for group {group_name}")
+        return queued
             
-    def _process_digest_topics(self, crawler: ZsxqCrawler, group_config: GroupConfig):
-        """Process digest topics for a group"""
+    def _process_digest_topics(self, crawler: ZsxqCrawler, group_config: GroupConfig, cancel: threading.Event) -> int:
+        """Crawl new digest topics of a group into the delivery pipeline, returning the number of topics queued"""
         group_id = group_config.get_group_id()
         group_name = self.group_manager.get_group_name(group_id)
         digest_state = StateManager.get_state(group_id, CrawlType.DIGEST)
         last_digest_id = digest_state.get('last_topic_id') if digest_state else None
+        last_digest_time = digest_state.get('update_time') if digest_state else None
         
         logger.info(f"the last topic id:{last_digest_id}")
-        digest_topics, _ = crawler.get_digest_topics(last_topic_id=last_digest_id)
-        if digest_topics:
-            thread_id = group_config.get_thread_id('digest')
-            success_count, last_topic_id, last_topic_create_time = self._process_topics(
-                crawler, digest_topics, CrawlType.DIGEST.value, thread_id
-            )
-            if success_count > 0:
-                StateManager.save_state(group_id, CrawlType.DIGEST, {
-                    'last_topic_id': last_topic_id,
-                    'update_time': last_topic_create_time.isoformat()
-                })
-                logger.info(f"Successfully forwarded {success_count} digest updates for group {group_name}")
+        if not crawler.has_new_digest_topics(last_digest_id, last_digest_time):
+            logger.info(f"No new digest content for group {group_name}")
+            return 0
+        digest_topics = crawler.stream_digest_topics(last_topic_id=last_digest_id, last_topic_create_time=last_digest_time)
+        thread_id = group_config.get_thread_id('digest')
+        queued = self._process_topics(crawler, digest_topics, CrawlType.DIGEST, thread_id, cancel)
+        if queued > 0:
+            logger.info(f"Queued {queued} digest updates of group {group_name} for delivery")
         else:
             logger.info(f"No new digest content for group {group_name}")
+        return queued
             
-    def _process_topics(self, crawler, topics, crawl_type, thread_id):
-        """Process topics: format and send to Telegram"""
-        success_count = 0
-        last_topic_id = None
-        last_topic_create_time = None
+    def _process_topics(self, crawler, topics, crawl_type: CrawlType, thread_id, cancel: Optional[threading.Event] = None) -> int:
+        """
+        Queue topics for delivery to Telegram
         
-        # Process topics from oldest to newest
-        reversed_topics = list(reversed(topics))
-        for topic in reversed_topics:
-            try:
-                # Format and send
-                message = TelegramFormatter.format_topic(topic, crawl_type)
-                self.notifier.send_message_with_media(
-                    text=message,
-                    thread_id=thread_id,
-                    images=topic.talk.images if topic.talk else None,
-                    files=topic.talk.files if topic.talk else None,
-                    parse_mode='HTML'
-                )
-                success_count += 1
-                logger.info(f"Sent topic: {topic.title or f'ID:{topic.topic_id}'}")
-                
-                # Record last processed topic ID
-                if not last_topic_create_time or topic.create_time > last_topic_create_time:
-                    last_topic_id = topic.topic_id
-                    last_topic_create_time = topic.create_time
-                    
-                time.sleep(2)  # Avoid sending too fast
-                
-            except Exception as e:
-                logger.error(f"Failed to process topic [ID:{topic.topic_id}]: {e}")
-                continue
-                
-        return success_count, last_topic_id, last_topic_create_time
+        Each topic is durable in the delivery outbox once submitted. Pages are
+        streamed newest first, so the crawl state only advances to the newest
+        topic once the whole stream is in the outbox; a crawl interrupted before
+        that, by cancellation or by the stream raising, leaves the state alone,
+        lists the same topics again next time and the outbox drops the ones it
+        already has.
+        
+        Args:
+            topics: Iterable of topics in delivery order, consumed lazily so delivery
+                starts while later pages are still being crawled
+            cancel: Stop after the current topic once set; the topics queued so far are still delivered
+
+        Returns:
+            int: Number of new topics queued
+
+        Raises:
+            CrawlIncompleteError: The listing failed before its last page
+            QuotaExceededError: The account's API call budget ran out part way
+        """
+        queued = 0
+        newest = None
+        for topic in topics:
+            if cancel and cancel.is_set():
+                logger.warning(f"Stopping {crawl_type.value} crawl of group {crawler.group_name}, the group was cancelled")
+                return queued
+            if not self.leases.owns(crawler.group_id):
+                logger.warning(f"Stopping {crawl_type.value} crawl of group {crawler.group_name}, its lease was lost")
+                return queued
+            if self.delivery.submit(crawler.group_id, crawl_type, thread_id, topic):
+                queued += 1
+            if newest is None or topic.create_time > newest.create_time:
+                newest = topic
+        if newest:
+            StateManager.save_state(crawler.group_id, crawl_type, {
+                'last_topic_id': newest.topic_id,
+                'update_time': newest.create_time.isoformat()
+            })
+        return queued
         
     def start(self, interval_minutes: int = 60):
-        """Start the scheduler with the specified interval"""
-        logger.info(f"Starting scheduler with {interval_minutes} minute interval")
+        """
+        Start the scheduler
+
+        Every group is polled right away, then on its own cadence: the interval
+        adapts to how often the group posts, starting from `interval_minutes`.
+        """
+        logger.info(f"Starting scheduler, initial interval {interval_minutes} minutes, "
+                    f"adapting between {CRAWL_MIN_INTERVAL_MINUTES} and {CRAWL_MAX_INTERVAL_MINUTES} minutes")
         self.running = True
+        self._initial_interval_minutes = interval_minutes
+        try:
+            self.group_manager.start_refresher()
+            self.leases.start(self.group_config_manager.get_group_configs(),
+                              lambda: set(self._in_flight) | self.delivery.pending_groups(), self._take_over)
         
-        # Run immediately on start
-        self.crawl_job()
+            # Poll every group immediately on start, skipping the ones leased to other replicas
+            now = time.monotonic()
+            with self._schedule_lock:
+                self._schedule = [(now, group_id) for group_id in self.group_config_manager.get_group_configs()]
+                heapq.heapify(self._schedule)
         
-        # Keep the scheduler running
-        while self.running:
-            try:
-                # Sleep for the specified interval
-                time.sleep(interval_minutes * 60)
-                
-                # Run the crawl job
-                self.crawl_job()
+            # Keep the scheduler running
+            busy = False
+            while self.running:
+                try:
+                    self._wakeup.clear()
+                    self._run_due_groups()
+                    self._cancel_timed_out(list(self._in_flight))
+                    if self._in_flight:
+                        busy = True
+                    elif busy:
+                        # Every polled group finished, a natural point to report the counters
+                        busy = False
+                        self._log_stats()
                 
-            except KeyboardInterrupt:
-                logger.info("Scheduler stopped by user")
-                self.running = False
-                break
-            except Exception as e:
-                logger.error(f"Error in scheduler loop: {str(e)}")
-                time.sleep(60)  # Wait a minute before retrying
+                    # Sleep until the next group is due or a poll finishes, waking up
+                    # regularly while groups run to enforce their timeouts
+                    with self._schedule_lock:
+                        next_due = self._schedule[0][0] if self._schedule else time.monotonic() + 60
+                    timeout = next_due - time.monotonic()
+                    if self._in_flight:
+                        timeout = min(timeout, 5)
+                    self._wakeup.wait(max(timeout, 0))
                 
+                except KeyboardInterrupt:
+                    logger.info("Scheduler stopped by user")
+                    self.running = False
+                    break
+                except Exception as e:
+                    logger.error(f"Error in scheduler loop: {str(e)}")
+                    time.sleep(60)  # Wait a minute before retrying
+        finally:
+            # However the loop ends, hand back the group leases so other replicas take over right away
+            self.stop()
+
     def stop(self):
-        """Stop the scheduler"""
+        """Stop the scheduler, releasing its group leases; safe to call more than once"""
+        if self._stopped:
+            return
+        self._stopped = True
         logger.info("Stopping scheduler")
-        self.running = False 
\ No newline at end of file
+        self.running = False
+        self._wakeup.set()
+        self.group_manager.stop_refresher()
+        for cancel in list(self._cancel_events.values()):
+            cancel.set()
+        self.delivery.stop()
+        self.leases.stop() 
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Bounded producer/consumer pipeline between crawling and Telegram delivery
+"""
+import queue
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from config import (
+    DELIVERY_INTERVAL_SECONDS,
+    DELIVERY_MAX_ATTEMPTS,
+    DELIVERY_QUEUE_SIZE,
+    DELIVERY_RETRY_BACKOFF_SECONDS,
+    DELIVERY_WORKERS,
+)
+from src.crawlers.models import Topic
+from src.formatters.message_formatter import TelegramFormatter
+from src.notifiers.telegram_notifier import TelegramNotifier
+from src.utils.delivery_outbox import DeliveryOutbox, OutboxEntry
+from src.utils.group_lease import GroupLeaseManager
+from src.utils.logger import setup_logger
+from state_manager import CrawlType
+
+logger = setup_logger(__name__)
+
+
+class DeliveryPipeline:
+    """
+    Delivers crawled topics to Telegram from worker threads
+
+    Crawlers submit topics and move on while workers send them. A submitted
+    topic is formatted and recorded in the DeliveryOutbox first, so it is
+    durable from then on: its crawl state may advance past it, a topic that
+    is already in the outbox is not queued again, and whatever was still
+    undelivered when the process stopped is sent on the next start without
+    crawling it again. A message that was sent just before a crash, without
+    being checkpointed, is sent once more.
+
+    Each group maps to one shard, a bounded queue drained by a single worker,
+    so a group's topics go out in the order they were submitted; a full
+    shard blocks the submitting crawler, which bounds the memory held by
+    topics waiting to be sent. Failed sends are retried with backoff up to
+    DELIVERY_MAX_ATTEMPTS times in total, across restarts.
+
+    With a GroupLeaseManager, only groups leased to this replica are sent:
+    their outbox backlog is resumed as their lease is acquired, and topics of
+    a group whose lease was lost stay in the outbox for its new owner.
+    """
+
+    def __init__(self, notifier: TelegramNotifier, workers: int = DELIVERY_WORKERS,
+                 queue_size: int = DELIVERY_QUEUE_SIZE, send_interval: float = DELIVERY_INTERVAL_SECONDS,
+                 leases: Optional[GroupLeaseManager] = None):
+        """
+        Args:
+            notifier: Notifier the topics are sent with
+            workers: Number of shards, each drained by one worker
+            queue_size: Topics waiting across all shards before submitters block
+            send_interval: Pause of a worker after each send, seconds
+            leases: Group ownership among replicas, None to send every group's topics
+        """
+        self.notifier = notifier
+        self.send_interval = send_interval
+        self.outbox = DeliveryOutbox()
+        self.leases = leases if leases and leases.enabled else None
+        workers = max(1, workers)
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, -(-queue_size // workers))) for _ in range(workers)]
+        # Groups are spread round-robin over the shards as they are first seen
+        self._shards: Dict[str, int] = {}
+        # Topics left undelivered by an earlier run, sent by each shard before its queue
+        self._backlogs: List[Deque[OutboxEntry]] = [deque() for _ in range(workers)]
+        # Submitted but not yet delivered topics per (group ID, crawl type)
+        self._pending: Dict[Tuple[str, str], int] = {}
+        # Outbox keys of the topics held by the backlogs and queues
+        self._queued: Set[Tuple[str, str, int]] = set()
+        # Groups whose lease was lost since their topics were queued, skipped until resumed
+        self._handed_over: Set[str] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+
+        if not self.leases:
+            self.resume()
+
+        self._threads = [
+            threading.Thread(target=self._worker, args=(i,), name=f'delivery-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _shard(self, group_id: str) -> int:
+        with self._lock:
+            if group_id not in self._shards:
+                self._shards[group_id] = len(self._shards) % len(self._queues)
+            return self._shards[group_id]
+
+    def resume(self, group_id: Optional[str] = None) -> int:
+        """
+        Queue the topics an earlier run left undelivered in the outbox
+
+        Args:
+            group_id: Only resume the topics of this group, None for every group
+
+        Returns:
+            int: Number of topics resumed
+        """
+        resumed = 0
+        with self._lock:
+            self._handed_over.discard(group_id)
+        for entry in self.outbox.undelivered(DELIVERY_MAX_ATTEMPTS, group_id):
+            key = (entry.group_id, entry.crawl_type)
+            shard = self._shard(entry.group_id)
+            with self._lock:
+                if (*key, entry.topic_id) in self._queued:
+                    continue
+                self._queued.add((*key, entry.topic_id))
+                self._pending[key] = self._pending.get(key, 0) + 1
+            self._backlogs[shard].append(entry)
+            resumed += 1
+        if resumed:
+            logger.info(f"Resuming delivery of {resumed} topics from the outbox"
+                        + (f" for group {group_id}" if group_id is not None else ""))
+        return resumed
+
+    def submit(self, group_id: str, crawl_type: CrawlType, thread_id: Optional[str], topic: Topic) -> bool:
+        """
+        Record a topic in the outbox and queue it for delivery, blocking while the group's shard is full
+
+        The topic is durable once this returns, even if the pipeline stopped
+        before it could be queued.
+
+        Returns:
+            bool: True if the topic was new, False if it was already in the outbox
+        """
+        entry = OutboxEntry(
+            group_id=group_id,
+            crawl_type=crawl_type.value,
+            topic_id=topic.topic_id,
+            create_time=topic.create_time.isoformat(),
+            thread_id=thread_id,
+            message=TelegramFormatter.format_topic(topic, crawl_type.value)
+        )
+        if not self.outbox.add(entry):
+            logger.info(f"Topic [ID:{topic.topic_id}] is already in the outbox, skipping")
+            return False
+        key = (group_id, entry.crawl_type)
+        with self._lock:
+            self._queued.add((*key, entry.topic_id))
+            self._pending[key] = self._pending.get(key, 0) + 1
+        shard = self._queues[self._shard(group_id)]
+        while not self._stop.is_set():
+            try:
+                shard.put(entry, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        self._done(entry)
+        return True
+
+    def pending_count(self) -> int:
+        """Number of topics waiting to be delivered"""
+        with self._lock:
+            return sum(self._pending.values())
+
+    def pending_groups(self) -> Set[str]:
+        """IDs of the groups with topics waiting to be delivered"""
+        with self._lock:
+            return {group_id for group_id, _ in self._pending}
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted topic has been delivered or given up on
+
+        Returns:
+            bool: False if topics were still pending when the timeout expired
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending or self._stop.is_set(), timeout=timeout)
+
+    def stop(self):
+        """Stop the workers after the topics they are sending; the rest stays in the outbox for the next start"""
+        self._stop.set()
+        with self._idle:
+            self._idle.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _done(self, entry: OutboxEntry):
+        key = (entry.group_id, entry.crawl_type)
+        with self._idle:
+            self._queued.discard((*key, entry.topic_id))
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                del self._pending[key]
+                self._idle.notify_all()
+
+    def _next(self, shard: int) -> Optional[OutboxEntry]:
+        backlog = self._backlogs[shard]
+        if backlog:
+            return backlog.popleft()
+        try:
+            return self._queues[shard].get(timeout=1)
+        except queue.Empty:
+            return None
+
+    def _worker(self, shard: int):
+        while not self._stop.is_set():
+            entry = self._next(shard)
+            if entry is None:
+                continue
+            try:
+                self._deliver(entry)
+            except Exception as e:
+                logger.error(f"Failed to process topic [ID:{entry.topic_id}]: {e}")
+            finally:
+                self._done(entry)
+            self._stop.wait(self.send_interval)  # Avoid sending too fast
+
+    def _deliver(self, entry: OutboxEntry):
+        """Send a topic, retrying with backoff, and checkpoint every attempt in the outbox"""
+        while not self._stop.is_set():
+            if self.leases and not self.leases.owns(entry.group_id):
+                with self._lock:
+                    first = entry.group_id not in self._handed_over
+                    self._handed_over.add(entry.group_id)
+                if first:
+                    logger.warning(f"Group {entry.group_id} is no longer leased to this replica, "
+                                   f"leaving its undelivered topics in the outbox for its new owner")
+                return
+            if self.notifier.send_message_with_media(text=entry.message, thread_id=entry.thread_id, parse_mode='HTML'):
+                self.outbox.mark_sent(entry)
+                logger.info(f"Sent topic: ID:{entry.topic_id}")
+                return
+            self.outbox.mark_failed(entry, 'send failed')
+            if entry.attempts >= DELIVERY_MAX_ATTEMPTS:
+                logger.error(f"Giving up on topic [ID:{entry.topic_id}] of group {entry.group_id} after {entry.attempts} attempts")
+                return
+            delay = DELIVERY_RETRY_BACKOFF_SECONDS * 2 ** (entry.attempts - 1)
+            logger.warning(f"Failed to send topic [ID:{entry.topic_id}] (attempt {entry.attempts}), retrying in {delay:.0f}s")
+            self._stop.wait(delay)
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import json
+
+
+DEFAULT_ACCOUNT_NAME = 'default'
+
+
+@dataclass
+class AccountConfig:
+    """知识星球 account data class"""
+    name: str
+    cookie: str
+    group_ids: List[str] = field(default_factory=list)
+    rate: Optional[float] = None  # Initial requests per second, None for RATE_LIMIT_INITIAL_RATE
+    max_rate: Optional[float] = None  # Max requests per second, None for RATE_LIMIT_MAX_RATE
+    daily_limit: Optional[int] = None  # API calls per day, None for QUOTA_DAILY_LIMIT, 0 for no limit
+    hourly_limit: Optional[int] = None  # API calls per hour, None for QUOTA_HOURLY_LIMIT, 0 for no limit
+
+    def get_headers(self) -> Dict[str, str]:
+        return {'Cookie': "zsxq_access_token=" + self.cookie}
+
+    def get_name(self) -> str:
+        return self.name
+
+class AccountConfigManager:
+    """
+    Maps groups to the accounts that crawl them
+
+    Accounts come from ZSXQ_ACCOUNTS, e.g.
+    {"alice": {"cookie": "...", "groups": ["123"], "rate": 1, "max_rate": 3,
+    "daily_limit": 2000, "hourly_limit": 300}}.
+    A ZSXQ_COOKIE, if set, becomes the `default` account for every group not
+    listed under another account.
+    """
+    def __init__(self, config_str: str, default_cookie: Optional[str] = None):
+        self.account_configs = dict[str, AccountConfig]()
+        self.default_account: Optional[AccountConfig] = None
+        self.load_account_configs(config_str, default_cookie)
+
+    def load_account_configs(self, config_str: str, default_cookie: Optional[str] = None):
+        data = json.loads(config_str)
+        for name, config in data.items():
+            self.account_configs[name] = AccountConfig(
+                name=name,
+                cookie=config['cookie'],
+                group_ids=[str(group_id) for group_id in config.get('groups', [])],
+                rate=config.get('rate'),
+                max_rate=config.get('max_rate'),
+                daily_limit=config.get('daily_limit'),
+                hourly_limit=config.get('hourly_limit')
+            )
+        if default_cookie:
+            self.default_account = self.account_configs.setdefault(
+                DEFAULT_ACCOUNT_NAME, AccountConfig(name=DEFAULT_ACCOUNT_NAME, cookie=default_cookie)
+            )
+
+    def get_account_for_group(self, group_id: str) -> Optional[AccountConfig]:
+        for account in self.account_configs.values():
+            if str(group_id) in account.group_ids:
+                return account
+        return self.default_account
+
+    def get_accounts(self) -> List[AccountConfig]:
+        return list(self.account_configs.values())
+
+    def get_unassigned_groups(self, group_ids: List[str]) -> List[str]:
+        return [group_id for group_id in group_ids if not self.get_account_for_group(group_id)]
+
+    def is_empty(self) -> bool:
+        return len(self.account_configs) == 0
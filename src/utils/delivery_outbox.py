@@ -0,0 +1,160 @@
+"""
+Durable outbox of crawled topics awaiting Telegram delivery
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import DELIVERY_OUTBOX_FILE, DELIVERY_OUTBOX_RETENTION_DAYS
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+
+@dataclass
+class OutboxEntry:
+    """A formatted topic message and its delivery checkpoint"""
+    group_id: str
+    crawl_type: str
+    topic_id: int
+    create_time: str
+    thread_id: Optional[str]
+    message: str
+    status: str = PENDING
+    attempts: int = 0
+
+
+class DeliveryOutbox:
+    """
+    SQLite outbox keyed by (group_id, crawl_type, topic_id)
+
+    A topic is recorded once it is crawled and formatted, then checkpointed
+    as sent or failed. Recording a topic that is already in the outbox is a
+    no-op, so re-crawled topics are never sent twice, and undelivered entries
+    survive restarts to be sent without crawling them again. Sent entries are
+    kept for DELIVERY_OUTBOX_RETENTION_DAYS for deduplication.
+    """
+    _instance = None
+    _initialized = False
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(DeliveryOutbox, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.retention_seconds = DELIVERY_OUTBOX_RETENTION_DAYS * 86400
+            self._lock = threading.Lock()
+            # Replicas and their delivery workers write the same file, wait for each other's locks
+            self._conn = sqlite3.connect(DELIVERY_OUTBOX_FILE, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "group_id TEXT NOT NULL, crawl_type TEXT NOT NULL, topic_id INTEGER NOT NULL, "
+                "create_time TEXT NOT NULL, thread_id TEXT, message TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, "
+                "crawled_at REAL NOT NULL, sent_at REAL, "
+                "PRIMARY KEY (group_id, crawl_type, topic_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, create_time)")
+            self._conn.commit()
+            self.prune()
+            self._initialized = True
+
+    def add(self, entry: OutboxEntry) -> bool:
+        """
+        Record a crawled and formatted topic
+
+        Returns:
+            bool: True if the topic was new, False if it was already in the outbox
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (group_id, crawl_type, topic_id, create_time, thread_id, message, status, crawled_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.group_id, entry.crawl_type, entry.topic_id, entry.create_time, entry.thread_id,
+                 entry.message, PENDING, time.time())
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def mark_sent(self, entry: OutboxEntry):
+        """Checkpoint a topic as delivered"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = NULL, sent_at = ? "
+                "WHERE group_id = ? AND crawl_type = ? AND topic_id = ?",
+                (SENT, time.time(), entry.group_id, entry.crawl_type, entry.topic_id)
+            )
+            self._conn.commit()
+        entry.status = SENT
+        entry.attempts += 1
+
+    def mark_failed(self, entry: OutboxEntry, error: str):
+        """Checkpoint a failed delivery attempt, the topic stays undelivered"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? "
+                "WHERE group_id = ? AND crawl_type = ? AND topic_id = ?",
+                (FAILED, error, entry.group_id, entry.crawl_type, entry.topic_id)
+            )
+            self._conn.commit()
+        entry.status = FAILED
+        entry.attempts += 1
+
+    def undelivered(self, max_attempts: int, group_id: Optional[str] = None) -> List[OutboxEntry]:
+        """
+        Get the topics still to be delivered, oldest first
+
+        Args:
+            max_attempts: Leave out topics that already failed this many times
+            group_id: Only get the topics of this group, None for every group
+        """
+        query = ("SELECT group_id, crawl_type, topic_id, create_time, thread_id, message, status, attempts "
+                 "FROM outbox WHERE status != ? AND attempts < ?")
+        params = [SENT, max_attempts]
+        if group_id is not None:
+            query += " AND group_id = ?"
+            params.append(group_id)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY create_time, topic_id", params).fetchall()
+        return [OutboxEntry(*row) for row in rows]
+
+    def prune(self):
+        """Remove delivered topics older than the retention period"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status = ? AND sent_at < ?", (SENT, time.time() - self.retention_seconds)
+            )
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} delivered topics from the outbox")
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of topics per delivery status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {PENDING: 0, SENT: 0, FAILED: 0, **dict(rows)}
+
+    def close(self):
+        """Close the outbox database"""
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+                self._initialized = False
+                DeliveryOutbox._instance = None
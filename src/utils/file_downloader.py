@@ -2,10 +2,10 @@
 文件下载工具
 """
 import os
-import requests
 import tempfile
 from pathlib import Path
 from config import TEMP_DIR
+from src.utils.http_client import HttpClient
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -32,14 +32,14 @@ class FileDownloader:
             file_path = TEMP_DIR / filename
             
             # Download file
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Save file
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            with HttpClient().get(url, stream=True) as response:
+                response.raise_for_status()
+                
+                # Save file
+                with open(file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if chunk:
+                            f.write(chunk)
                         
             logger.info(f"Successfully downloaded file: {filename}")
             return str(file_path)
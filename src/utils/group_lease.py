@@ -0,0 +1,201 @@
+"""
+Lease-based ownership of groups shared by scheduler replicas
+"""
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Set
+
+from config import CRAWL_INSTANCE_ID, CRAWL_LEASE_FILE, CRAWL_LEASE_TTL_SECONDS
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class GroupLeaseManager:
+    """
+    Hands out groups to scheduler replicas through renewable leases
+
+    Replicas share a SQLite database at CRAWL_LEASE_FILE. Each one heartbeats
+    there and holds a lease per group it crawls, renewed every third of
+    CRAWL_LEASE_TTL_SECONDS. On every renewal a replica takes free or expired
+    leases up to its fair share of the groups, the group count divided by the
+    live replicas, and releases the ones above it that it is not crawling, so
+    groups spread out as replicas join and are taken over once the lease of a
+    replica that died expires.
+
+    A replica stops treating a group as its own two thirds of the TTL after
+    its last successful renewal, before anyone else may take it over, so a
+    stalled replica finishes the send it is in but starts no new ones.
+
+    Without CRAWL_LEASE_FILE there is a single replica that owns every group.
+    """
+    _instance = None
+    _initialized = False
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(GroupLeaseManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.enabled = bool(CRAWL_LEASE_FILE)
+            self.instance_id = CRAWL_INSTANCE_ID or f"{socket.gethostname()}-{os.getpid()}"
+            self.ttl = CRAWL_LEASE_TTL_SECONDS
+            self._lock = threading.Lock()
+            self._conn = None
+            # Groups leased to this replica and the wall-clock time until which they count as owned
+            self._owned: Set[str] = set()
+            self._valid_until = 0.0
+            self._group_ids: List[str] = []
+            self._in_use: Callable[[], Iterable[str]] = lambda: ()
+            self._on_acquired: Callable[[str], None] = lambda group_id: None
+            self._renewer: Optional[threading.Thread] = None
+            self._stop = threading.Event()
+            if self.enabled:
+                self._conn = sqlite3.connect(CRAWL_LEASE_FILE, timeout=30, isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS instances (instance_id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL)")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS leases ("
+                    "group_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            self._initialized = True
+
+    def owns(self, group_id: str) -> bool:
+        """Check whether this replica may crawl and deliver a group right now"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            return str(group_id) in self._owned and time.time() < self._valid_until
+
+    def owned_groups(self) -> Set[str]:
+        """Get the groups currently leased to this replica"""
+        with self._lock:
+            return set(self._owned)
+
+    def renew(self, group_ids: Iterable[str], in_use: Iterable[str] = ()) -> Set[str]:
+        """
+        Heartbeat, renew the leases held and rebalance towards a fair share of the groups
+
+        Args:
+            group_ids: All configured group IDs
+            in_use: Groups being crawled, kept even above the fair share
+
+        Returns:
+            set: IDs of the groups newly acquired by this call
+        """
+        if not self.enabled:
+            return set()
+        group_ids = [str(group_id) for group_id in group_ids]
+        in_use = {str(group_id) for group_id in in_use}
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO instances VALUES (?, ?)", (self.instance_id, now))
+                conn.execute("DELETE FROM instances WHERE heartbeat_at < ?", (now - self.ttl,))
+                live = conn.execute("SELECT COUNT(*) FROM instances").fetchone()[0]
+                share = math.ceil(len(group_ids) / max(1, live))
+
+                leases = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT group_id, owner, expires_at FROM leases")}
+                owned = [group_id for group_id in group_ids if leases.get(group_id, (None,))[0] == self.instance_id]
+                # Give up the groups above the fair share, idle ones first
+                surplus = len(owned) - share
+                released = []
+                for group_id in sorted(owned, key=lambda group_id: group_id in in_use):
+                    if len(released) >= surplus or group_id in in_use:
+                        break
+                    released.append(group_id)
+                owned = [group_id for group_id in owned if group_id not in released]
+                acquired = []
+                for group_id in group_ids:
+                    if len(owned) + len(acquired) >= share:
+                        break
+                    lease = leases.get(group_id)
+                    if lease is None or (lease[0] != self.instance_id and lease[1] < now):
+                        acquired.append(group_id)
+
+                conn.executemany("DELETE FROM leases WHERE group_id = ? AND owner = ?",
+                                 [(group_id, self.instance_id) for group_id in released])
+                conn.executemany("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)",
+                                 [(group_id, self.instance_id, expires_at) for group_id in owned + acquired])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._owned = set(owned + acquired)
+            self._valid_until = now + self.ttl * 2 / 3
+
+        if released or acquired:
+            logger.info(f"Replica {self.instance_id} ({live} live) released {released or 'none'}, "
+                        f"acquired {acquired or 'none'}, now owns {len(owned) + len(acquired)} of {len(group_ids)} groups")
+        return set(acquired)
+
+    def release_all(self):
+        """Hand back every lease and leave the replica set, so other replicas take over right away"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM leases WHERE owner = ?", (self.instance_id,))
+            self._conn.execute("DELETE FROM instances WHERE instance_id = ?", (self.instance_id,))
+            self._conn.execute("COMMIT")
+            self._owned = set()
+        logger.info(f"Replica {self.instance_id} released its group leases")
+
+    def start(self, group_ids: Iterable[str], in_use: Callable[[], Iterable[str]],
+              on_acquired: Callable[[str], None]):
+        """
+        Take the first leases and keep renewing them from a background thread
+
+        Args:
+            group_ids: All configured group IDs
+            in_use: Returns the groups being crawled, which are never released
+            on_acquired: Called with each group this replica takes over
+        """
+        if not self.enabled or (self._renewer and self._renewer.is_alive()):
+            return
+        self._group_ids = [str(group_id) for group_id in group_ids]
+        self._in_use = in_use
+        self._on_acquired = on_acquired
+        self._renew_and_notify()
+        self._stop.clear()
+        self._renewer = threading.Thread(target=self._renew_loop, name='lease-renewer', daemon=True)
+        self._renewer.start()
+        logger.info(f"Started lease renewer of replica {self.instance_id}, lease TTL {self.ttl:g}s")
+
+    def stop(self):
+        """Stop renewing and release every lease"""
+        self._stop.set()
+        if self._renewer:
+            self._renewer.join()
+            self._renewer = None
+        self.release_all()
+
+    def _renew_and_notify(self):
+        for group_id in self.renew(self._group_ids, self._in_use()):
+            try:
+                self._on_acquired(group_id)
+            except Exception as e:
+                logger.error(f"Failed to take over group {group_id}: {e}")
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self._renew_and_notify()
+            except Exception as e:
+                logger.error(f"Failed to renew group leases: {e}")
@@ -0,0 +1,208 @@
+"""
+Shared HTTP client for 知识星球 API requests and file downloads
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import msgspec
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    HTTP_BACKOFF_BASE_SECONDS,
+    HTTP_BACKOFF_MAX_SECONDS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_SIZE,
+    HTTP_READ_TIMEOUT,
+)
+from src.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = setup_logger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+@dataclass
+class LatencyStats:
+    """Request latency statistics of a single endpoint"""
+    count: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client
+
+    Wraps one pooled keep-alive requests.Session (and one aiohttp session for
+    async crawlers) with connect/read timeouts, retries with jittered
+    exponential backoff on 5xx responses and connection errors, and
+    per-endpoint latency statistics.
+    """
+    _instance = None
+    _initialized = False
+    _async_session: Optional['aiohttp.ClientSession'] = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(HttpClient, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+            self.max_retries = HTTP_MAX_RETRIES
+            self._stats: Dict[str, LatencyStats] = {}
+            self._stats_lock = threading.Lock()
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+            self._session.headers.update({'User-Agent': USER_AGENT})
+            self._initialized = True
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        """Normalize a URL into an endpoint key, e.g. api.zsxq.com/v2/topics/{id}/info"""
+        parsed = urlparse(url)
+        return parsed.netloc + re.sub(r'/\d+', '/{id}', parsed.path)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _record(self, endpoint: str, elapsed: float, error: bool = False, retry: bool = False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, LatencyStats())
+            stats.count += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None, stream: bool = False,
+            before_attempt: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        Send a GET request, retrying 5xx responses and connection errors
+
+        Args:
+            before_attempt: Called before every attempt, retries included, e.g. to
+                count the call against a quota; an exception it raises aborts the request
+
+        Returns:
+            requests.Response: The final response, which may still be an error status
+        """
+        endpoint = self._endpoint(url)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if before_attempt:
+                before_attempt()
+            start = time.monotonic()
+            try:
+                response = self._session.get(url, headers=headers, params=params, stream=stream, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, time.monotonic() - start, error=True, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                logger.warning(f"Request to {endpoint} failed (attempt {attempt + 1}): {e}, retrying")
+            else:
+                server_error = response.status_code >= 500
+                self._record(endpoint, time.monotonic() - start, error=server_error, retry=server_error and not last_attempt)
+                if not server_error or last_attempt:
+                    return response
+                response.close()
+                logger.warning(f"Request to {endpoint} returned {response.status_code} (attempt {attempt + 1}), retrying")
+            time.sleep(self._backoff(attempt))
+
+    @classmethod
+    def get_async_session(cls) -> 'aiohttp.ClientSession':
+        """Get the shared aiohttp session, creating it on first use"""
+        # aiohttp takes longer to import than the rest of the crawler, sync-only runs never pay for it
+        import aiohttp
+        if cls._async_session is None or cls._async_session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+            cls._async_session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'User-Agent': USER_AGENT})
+        return cls._async_session
+
+    @classmethod
+    async def close_async_session(cls):
+        """Close the shared aiohttp session"""
+        if cls._async_session is not None and not cls._async_session.closed:
+            await cls._async_session.close()
+        cls._async_session = None
+
+    async def get_json_async(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
+                             before_attempt: Optional[Callable[[], Awaitable[None]]] = None) -> Tuple[int, Any]:
+        """
+        Send a GET request on the shared aiohttp session, retrying 5xx responses and connection errors
+
+        Args:
+            before_attempt: Awaited before every attempt, retries included, e.g. to
+                count the call against a quota; an exception it raises aborts the request
+
+        Returns:
+            tuple: (status code, decoded JSON body or None for error statuses)
+        """
+        import aiohttp
+        endpoint = self._endpoint(url)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if before_attempt:
+                await before_attempt()
+            start = time.monotonic()
+            try:
+                async with self.get_async_session().get(url, headers=headers, params=params) as response:
+                    status = response.status
+                    data = msgspec.json.decode(await response.read()) if status < 400 else None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._record(endpoint, time.monotonic() - start, error=True, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                logger.warning(f"Request to {endpoint} failed (attempt {attempt + 1}): {e}, retrying")
+            else:
+                server_error = status >= 500
+                self._record(endpoint, time.monotonic() - start, error=server_error, retry=server_error and not last_attempt)
+                if not server_error or last_attempt:
+                    return status, data
+                logger.warning(f"Request to {endpoint} returned {status} (attempt {attempt + 1}), retrying")
+            await asyncio.sleep(self._backoff(attempt))
+
+    def get_stats(self) -> Dict[str, LatencyStats]:
+        """Get a snapshot of per-endpoint latency statistics"""
+        with self._stats_lock:
+            return {endpoint: LatencyStats(**vars(stats)) for endpoint, stats in self._stats.items()}
+
+    def log_stats(self):
+        """Log per-endpoint latency statistics"""
+        for endpoint, stats in sorted(self.get_stats().items()):
+            logger.info(
+                f"{endpoint}: {stats.count} requests, {stats.errors} errors, {stats.retries} retries, "
+                f"avg {stats.avg_seconds * 1000:.0f}ms, max {stats.max_seconds * 1000:.0f}ms"
+            )
@@ -0,0 +1,163 @@
+"""
+API call budget and quota accounting for 知识星球 accounts
+"""
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from config import QUOTA_DAILY_LIMIT, QUOTA_FILE, QUOTA_HOURLY_LIMIT, QUOTA_RESERVE_RATIO, QUOTA_RETENTION_DAYS
+from src.utils.account_config import AccountConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Raised when an account has no API call budget left for a request"""
+
+
+class QuotaManager:
+    """
+    API call counters with daily and hourly budgets per account, shared by every process
+
+    Calls are counted per hour, account, group and endpoint ('listing',
+    'detail' or 'group') in a SQLite database at QUOTA_FILE, so budgets survive
+    restarts and scheduler replicas sharing an account draw on one budget:
+    each call is checked against the budget and counted in a single
+    transaction. Low priority calls (digest detail fetches) are refused once
+    less than QUOTA_RESERVE_RATIO of a budget is left, keeping the rest for
+    listings.
+    """
+    _instance = None
+    _initialized = False
+    # Crawler threads may build the first instance concurrently
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(QuotaManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.quota_file = QUOTA_FILE
+            self._lock = threading.Lock()
+            self._conn = sqlite3.connect(self.quota_file, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # Hours as local 'YYYY-MM-DDTHH', so a day's hours share its 'YYYY-MM-DD' prefix
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "hour TEXT NOT NULL, account TEXT NOT NULL, group_id TEXT NOT NULL, endpoint TEXT NOT NULL, "
+                "calls INTEGER NOT NULL, PRIMARY KEY (account, hour, group_id, endpoint))"
+            )
+            self.flush()
+            self._initialized = True
+
+    @staticmethod
+    def _hour_key(now: Optional[datetime] = None) -> str:
+        return (now or datetime.now()).strftime('%Y-%m-%dT%H')
+
+    def _used(self, account_name: str, period: str) -> int:
+        """Count calls of an account in every hour starting with `period` (an hour or a day key)"""
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(calls), 0) FROM usage WHERE account = ? AND hour >= ? AND hour < ?",
+            (account_name, period, period + '~')
+        ).fetchone()[0]
+
+    def _has_budget(self, account: AccountConfig, low_priority: bool) -> bool:
+        hour = self._hour_key()
+        limits = (
+            (account.hourly_limit if account.hourly_limit is not None else QUOTA_HOURLY_LIMIT, hour),
+            (account.daily_limit if account.daily_limit is not None else QUOTA_DAILY_LIMIT, hour[:10]),
+        )
+        for limit, period in limits:
+            if limit <= 0:
+                continue
+            reserve = limit * QUOTA_RESERVE_RATIO if low_priority else 0
+            if self._used(account.name, period) >= limit - reserve:
+                return False
+        return True
+
+    def try_acquire(self, account: AccountConfig, group_id: str, endpoint: str, low_priority: bool = False) -> bool:
+        """
+        Count one API call if the account's budget allows it
+
+        Args:
+            account: Account making the call
+            group_id: Group the call is made for
+            endpoint: Endpoint kind ('listing', 'detail' or 'group')
+            low_priority: Whether the call is refused first when the budget runs low
+
+        Returns:
+            bool: True if the call was counted and may be sent
+        """
+        with self._lock:
+            # An immediate transaction keeps other processes out between the check and the count
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self._has_budget(account, low_priority):
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT INTO usage VALUES (?, ?, ?, ?, 1) "
+                    "ON CONFLICT (account, hour, group_id, endpoint) DO UPDATE SET calls = calls + 1",
+                    (self._hour_key(), account.name, str(group_id), endpoint)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def acquire(self, account: AccountConfig, group_id: str, endpoint: str, low_priority: bool = False):
+        """Count one API call, raising QuotaExceededError if the account's budget does not allow it"""
+        if not self.try_acquire(account, group_id, endpoint, low_priority):
+            raise QuotaExceededError(f"API call budget of account {account.name} exhausted, skipping {endpoint} request for group {group_id}")
+
+    def flush(self):
+        """Drop the counters older than QUOTA_RETENTION_DAYS, calls themselves are stored as they are counted"""
+        oldest = self._hour_key(datetime.now() - timedelta(days=QUOTA_RETENTION_DAYS))
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM usage WHERE hour < ?", (oldest,))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune API quota counters: {e}")
+
+    def get_usage(self, day: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Get the calls of a day
+
+        Args:
+            day: Local date as 'YYYY-MM-DD', None for today
+
+        Returns:
+            dict: {account: {group_id: {endpoint: calls}}}
+        """
+        day = day or self._hour_key()[:10]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT account, group_id, endpoint, SUM(calls) FROM usage WHERE hour >= ? AND hour < ? "
+                "GROUP BY account, group_id, endpoint",
+                (day, day + '~')
+            ).fetchall()
+        usage: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for account_name, group_id, endpoint, calls in rows:
+            usage.setdefault(account_name, {}).setdefault(group_id, {})[endpoint] = calls
+        return usage
+
+    def log_stats(self):
+        """Log today's API calls per account, group and endpoint"""
+        for account_name, groups in sorted(self.get_usage().items()):
+            total = sum(calls for endpoints in groups.values() for calls in endpoints.values())
+            logger.info(f"API calls today for account {account_name}: {total}")
+            for group_id, endpoints in sorted(groups.items()):
+                breakdown = ', '.join(f"{endpoint} {calls}" for endpoint, calls in sorted(endpoints.items()))
+                logger.info(f"  group {group_id}: {breakdown}")
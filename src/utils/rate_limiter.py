@@ -0,0 +1,102 @@
+"""
+Adaptive rate limiter for 知识星球 API requests
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from config import (
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_INITIAL_RATE,
+    RATE_LIMIT_MAX_BACKOFF_SECONDS,
+    RATE_LIMIT_MAX_RATE,
+    RATE_LIMIT_MIN_RATE,
+)
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to API feedback
+
+    The rate grows additively after every successful request and is halved on
+    throttling, which also starts an exponentially growing cooldown. Requests
+    only wait when the bucket is empty or a cooldown is active.
+    """
+    _limiters: Dict[str, 'AdaptiveRateLimiter'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, rate: float = RATE_LIMIT_INITIAL_RATE, burst: int = RATE_LIMIT_BURST,
+                 min_rate: float = RATE_LIMIT_MIN_RATE, max_rate: float = RATE_LIMIT_MAX_RATE):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_key(cls, key: str, rate: Optional[float] = None, max_rate: Optional[float] = None) -> 'AdaptiveRateLimiter':
+        """
+        Get the limiter shared by every crawler using the same key (account)
+
+        Args:
+            key: Limiter key, one per account
+            rate: Initial requests per second, None for RATE_LIMIT_INITIAL_RATE
+            max_rate: Max requests per second, None for RATE_LIMIT_MAX_RATE
+        """
+        with cls._registry_lock:
+            if key not in cls._limiters:
+                max_rate = max_rate or RATE_LIMIT_MAX_RATE
+                cls._limiters[key] = cls(rate=min(rate or RATE_LIMIT_INITIAL_RATE, max_rate), max_rate=max_rate)
+            return cls._limiters[key]
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return wait + max(0.0, self._cooldown_until - now)
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def cooldown_remaining(self) -> float:
+        """Seconds left of the backoff cooldown started by the last throttle, 0 if none is active"""
+        with self._lock:
+            return max(0.0, self._cooldown_until - time.monotonic())
+
+    def on_success(self):
+        """Speed up after a successful request"""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.min_rate)
+
+    def on_throttle(self):
+        """Slow down and back off exponentially after being throttled"""
+        with self._lock:
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            backoff = min(RATE_LIMIT_MAX_BACKOFF_SECONDS, 2 ** self._consecutive_throttles)
+            self._cooldown_until = time.monotonic() + backoff
+            # Drop saved-up tokens so requests resume at the reduced rate
+            self._tokens = min(self._tokens, 0.0)
+            logger.warning(f"Throttled by API, rate lowered to {self.rate:.2f} req/s, backing off {backoff}s")
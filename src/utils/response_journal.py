@@ -0,0 +1,183 @@
+"""
+Append-only journal of raw 知识星球 API responses
+"""
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import JOURNAL_DIR, JOURNAL_SEGMENT_MAX_BYTES
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ResponseJournal:
+    """
+    Per-group journal of raw JSON responses for offline replay
+
+    Records are NDJSON lines stored in size-rotated `segment-NNNNNN.ndjson.gz`
+    files. Every record is written as its own gzip member, so a segment is a
+    valid gzip stream for sequential replay while `index.ndjson` maps each
+    topic_id to the byte range of the newest record holding it for random
+    lookup. Detail responses take precedence over listings in the index.
+    Every process writes to a segment of its own, so records never follow
+    one torn by an earlier crash.
+    """
+    _journals: Dict[str, 'ResponseJournal'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, group_id: str, journal_dir: Path = JOURNAL_DIR, max_segment_bytes: int = JOURNAL_SEGMENT_MAX_BYTES):
+        self.group_id = str(group_id)
+        self.directory = Path(journal_dir) / self.group_id
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int, int, str]] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        # Never append to an existing segment, its last record may have been torn by a crash
+        self._segment = max(self._segment_numbers(), default=0) + 1
+        self._load_index()
+
+    @classmethod
+    def for_group(cls, group_id: str) -> 'ResponseJournal':
+        """Get the journal shared by every crawler of a group"""
+        with cls._registry_lock:
+            key = str(group_id)
+            if key not in cls._journals:
+                cls._journals[key] = cls(key)
+            return cls._journals[key]
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.ndjson.gz"
+
+    def _segment_numbers(self):
+        for path in self.directory.glob('segment-*.ndjson.gz'):
+            match = re.match(r'segment-(\d+)\.ndjson\.gz$', path.name)
+            if match:
+                yield int(match.group(1))
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / 'index.ndjson'
+
+    def _load_index(self):
+        if not self._index_path.exists():
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted write
+                    continue
+                self._index_entry(entry['topic_id'], entry['segment'], entry['offset'], entry['length'], entry['kind'])
+
+    def _index_entry(self, topic_id, segment: int, offset: int, length: int, kind: str) -> bool:
+        key = str(topic_id)
+        existing = self._index.get(key)
+        if existing and existing[3] == 'detail' and kind != 'detail':
+            return False
+        self._index[key] = (segment, offset, length, kind)
+        return True
+
+    @staticmethod
+    def _topic_ids(kind: str, data: Dict[str, Any]):
+        resp_data = data.get('resp_data') or {}
+        if kind == 'detail':
+            topic = resp_data.get('topic') or {}
+            if topic.get('topic_id'):
+                yield topic['topic_id']
+        elif kind == 'listing':
+            for topic in resp_data.get('topics') or []:
+                if topic.get('topic_id'):
+                    yield topic['topic_id']
+
+    def record(self, kind: str, url: str, params: Optional[Dict[str, Any]], data: Dict[str, Any]):
+        """
+        Append a raw response to the journal
+
+        Args:
+            kind: Response kind ('listing', 'detail' or 'group')
+            url: Request URL
+            params: Request query parameters
+            data: Decoded JSON response
+        """
+        try:
+            line = json.dumps({'ts': time.time(), 'kind': kind, 'url': url, 'params': params, 'data': data}, ensure_ascii=False)
+            member = gzip.compress(line.encode('utf-8') + b'\n')
+            with self._lock:
+                path = self._segment_path(self._segment)
+                if path.exists() and path.stat().st_size >= self.max_segment_bytes:
+                    self._segment += 1
+                    path = self._segment_path(self._segment)
+                with open(path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(member)
+                index_lines = []
+                for topic_id in self._topic_ids(kind, data):
+                    if self._index_entry(topic_id, self._segment, offset, len(member), kind):
+                        index_lines.append(json.dumps({'topic_id': topic_id, 'segment': self._segment, 'offset': offset, 'length': len(member), 'kind': kind}) + '\n')
+                if index_lines:
+                    with open(self._index_path, 'a', encoding='utf-8') as f:
+                        f.writelines(index_lines)
+        except Exception as e:
+            logger.error(f"Failed to journal {kind} response for group {self.group_id}: {e}")
+
+    def lookup(self, topic_id) -> Optional[Dict[str, Any]]:
+        """
+        Find the newest journaled raw data of a topic
+
+        Returns:
+            Dict: Raw topic data, None if the topic was never journaled
+        """
+        with self._lock:
+            entry = self._index.get(str(topic_id))
+        if not entry:
+            return None
+        segment, offset, length, kind = entry
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            record = json.loads(gzip.decompress(f.read(length)))
+        resp_data = record['data'].get('resp_data') or {}
+        if kind == 'detail':
+            return resp_data.get('topic')
+        for topic in resp_data.get('topics') or []:
+            if str(topic.get('topic_id')) == str(topic_id):
+                return topic
+        return None
+
+    def iter_records(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Replay journaled records in write order
+
+        Args:
+            kind: Only yield records of this kind, None for all
+        """
+        for segment in sorted(self._segment_numbers()):
+            try:
+                with gzip.open(self._segment_path(segment), 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            logger.warning(f"Skipping corrupt journal line in segment {segment} of group {self.group_id}")
+                            continue
+                        if kind is None or record.get('kind') == kind:
+                            yield record
+            except (EOFError, OSError, zlib.error) as e:
+                # A record torn by a crash ends the readable part of its segment, replay goes on with the next one
+                logger.warning(f"Journal segment {segment} of group {self.group_id} is truncated: {e}")
+
+    def iter_topics(self) -> Iterator[Dict[str, Any]]:
+        """Replay raw topic data from every journaled listing and detail response"""
+        for record in self.iter_records():
+            resp_data = record['data'].get('resp_data') or {}
+            if record['kind'] == 'detail' and resp_data.get('topic'):
+                yield resp_data['topic']
+            elif record['kind'] == 'listing':
+                yield from resp_data.get('topics') or []
@@ -0,0 +1,45 @@
+"""
+Timestamp parsing shared by the 知识星球 models
+"""
+from datetime import datetime
+from functools import lru_cache
+
+PARSE_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(value: str) -> datetime:
+    text = value
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    elif len(text) > 5 and text[-5] in '+-' and text[-4:].isdigit():
+        # fromisoformat only takes +HH:MM offsets before Python 3.11
+        text = f"{text[:-2]}:{text[-2:]}"
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid 知识星球 timestamp: {value!r}") from None
+
+
+def parse_zsxq_time(value: str) -> datetime:
+    """
+    Parse a 知识星球 ISO-8601 timestamp
+
+    Supports the formats returned by the API, e.g.
+    - 2023-03-15T09:59:46.346+0800
+    - 2023-03-15T09:59:46+0800
+    - 2023-03-15T09:59:46.346Z
+    Results are cached, timestamps repeat across pages, cache hits and details.
+
+    Args:
+        value: Timestamp string
+
+    Returns:
+        datetime: Parsed time, timezone-aware when the value carries an offset
+
+    Raises:
+        ValueError: If the value is missing or malformed
+    """
+    if not value or not isinstance(value, str):
+        raise ValueError(f"Invalid 知识星球 timestamp: {value!r}")
+    return _parse(value)
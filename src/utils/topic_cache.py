@@ -0,0 +1,122 @@
+"""
+Persistent topic detail cache
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import TOPIC_CACHE_FILE, TOPIC_CACHE_MAX_ENTRIES, TOPIC_CACHE_TTL_HOURS
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TopicCache:
+    """
+    On-disk cache of raw topic data keyed by topic_id
+
+    Entries expire after TOPIC_CACHE_TTL_HOURS, and the least recently used
+    entries are evicted once the cache holds more than TOPIC_CACHE_MAX_ENTRIES.
+    """
+    _instance = None
+    _initialized = False
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(TopicCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.ttl_seconds = TOPIC_CACHE_TTL_HOURS * 3600
+            self.max_entries = TOPIC_CACHE_MAX_ENTRIES
+            self.hits = 0
+            self.misses = 0
+            self._lock = threading.Lock()
+            # Replicas share the cache file, wait for each other's locks
+            self._conn = sqlite3.connect(TOPIC_CACHE_FILE, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS topics ("
+                "topic_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_topics_accessed_at ON topics (accessed_at)")
+            self._conn.commit()
+            self._initialized = True
+
+    def get(self, topic_id) -> Optional[Dict[str, Any]]:
+        """Get cached raw topic data, None if missing or expired"""
+        key = str(topic_id)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data, fetched_at FROM topics WHERE topic_id = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl_seconds:
+                    if row is not None:
+                        self._conn.execute("DELETE FROM topics WHERE topic_id = ?", (key,))
+                        self._conn.commit()
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE topics SET accessed_at = ? WHERE topic_id = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+            return json.loads(row[0])
+        except Exception as e:
+            logger.error(f"Failed to read topic cache (ID: {topic_id}): {e}")
+            return None
+
+    def put(self, topic_id, data: Dict[str, Any]):
+        """Store raw topic data, evicting least recently used entries when full"""
+        now = time.time()
+        try:
+            payload = json.dumps(data, ensure_ascii=False)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO topics (topic_id, data, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (str(topic_id), payload, now, now)
+                )
+                excess = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM topics WHERE topic_id IN "
+                        "(SELECT topic_id FROM topics ORDER BY accessed_at ASC LIMIT ?)",
+                        (excess,)
+                    )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to write topic cache (ID: {topic_id}): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the current number of entries"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
+
+    def clear(self):
+        """Remove all cached topics and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM topics")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+                self._initialized = False
+                TopicCache._instance = None
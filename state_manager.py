@@ -3,11 +3,18 @@ State persistence manager for the 知识星球 crawler.
 """
 import json
 import os
+import threading
+from contextlib import contextmanager
 from enum import Enum
 from typing import Any, Dict, Optional
 
 from config import LAST_CRAWLED_FILE
 
+try:
+    import fcntl
+except ImportError:  # Windows, state file writes are then only serialized within the process
+    fcntl = None
+
 
 class CrawlType(Enum):
     """Crawl type enumeration"""
@@ -16,6 +23,32 @@ class CrawlType(Enum):
 
 
 class StateManager:
+    # Groups are crawled concurrently, serialize the read-modify-write cycles on the state file
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def _locked():
+        """Hold the state file lock of this process and, since scheduler replicas share the file, of every other one"""
+        with StateManager._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{LAST_CRAWLED_FILE}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write(state: Dict[str, Any]):
+        """Replace the state file, through a temp file so neither a crash nor a concurrent reader sees a partial write"""
+        tmp_file = f"{LAST_CRAWLED_FILE}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, LAST_CRAWLED_FILE)
+
     @staticmethod
     def save_state(group_id: str, crawl_type: CrawlType, state_data: Dict[str, Any]):
         """
@@ -27,22 +60,22 @@ class StateManager:
             state_data: State data dictionary
         """
         try:
-            # Read existing state
-            current_state = {}
-            if os.path.exists(LAST_CRAWLED_FILE):
-                with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
-                    current_state = json.load(f)
-            
-            # Initialize group state if not exists
-            if group_id not in current_state:
-                current_state[group_id] = {}
-            
-            # Update specific type state for the group
-            current_state[group_id][crawl_type.value] = state_data
-            
-            # Save state
-            with open(LAST_CRAWLED_FILE, 'w', encoding='utf-8') as f:
-                json.dump(current_state, f, ensure_ascii=False, indent=2)
+            with StateManager._locked():
+                # Read existing state
+                current_state = {}
+                if os.path.exists(LAST_CRAWLED_FILE):
+                    with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
+                        current_state = json.load(f)
+                
+                # Initialize group state if not exists
+                if group_id not in current_state:
+                    current_state[group_id] = {}
+                
+                # Update specific type state for the group
+                current_state[group_id][crawl_type.value] = state_data
+                
+                # Save state
+                StateManager._write(current_state)
                 
         except Exception as e:
             print(f"Failed to save state: {e}")
@@ -70,23 +103,90 @@ class StateManager:
         return None
     
     @staticmethod
-    def clear_state(group_id: Optional[str] = None):
+    def save_backfill_cursor(group_id: str, crawl_type: CrawlType, cursor_data: Dict[str, Any]):
         """
-        Clear state for a specific group or all groups
+        Save the backfill pagination cursor for a specific group and crawl type
         
         Args:
-            group_id: Group ID to clear state for, None to clear all states
+            group_id: Group ID
+            crawl_type: Crawl type
+            cursor_data: Cursor data dictionary
+        """
+        try:
+            with StateManager._locked():
+                current_state = {}
+                if os.path.exists(LAST_CRAWLED_FILE):
+                    with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
+                        current_state = json.load(f)
+            
+                backfill_state = current_state.setdefault(group_id, {}).setdefault('backfill', {})
+                backfill_state[crawl_type.value] = cursor_data
+            
+                StateManager._write(current_state)
+                
+        except Exception as e:
+            print(f"Failed to save backfill cursor: {e}")
+    
+    @staticmethod
+    def get_backfill_cursor(group_id: str, crawl_type: CrawlType) -> Optional[Dict[str, Any]]:
+        """
+        Get the backfill pagination cursor for a specific group and crawl type
+        
+        Args:
+            group_id: Group ID
+            crawl_type: Crawl type
+            
+        Returns:
+            Dict: Cursor data dictionary, None if no backfill was started
         """
         try:
             if os.path.exists(LAST_CRAWLED_FILE):
-                if group_id is None:
-                    os.remove(LAST_CRAWLED_FILE)
-                else:
+                with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                    return state.get(group_id, {}).get('backfill', {}).get(crawl_type.value)
+        except Exception as e:
+            print(f"Failed to read backfill cursor: {e}")
+        return None
+    
+    @staticmethod
+    def clear_backfill_cursor(group_id: str, crawl_type: CrawlType):
+        """
+        Clear the backfill pagination cursor so the next backfill starts over
+        
+        Args:
+            group_id: Group ID
+            crawl_type: Crawl type
+        """
+        try:
+            with StateManager._locked():
+                if os.path.exists(LAST_CRAWLED_FILE):
                     with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
                         state = json.load(f)
-                    if group_id in state:
-                        del state[group_id]
-                        with open(LAST_CRAWLED_FILE, 'w', encoding='utf-8') as f:
-                            json.dump(state, f, ensure_ascii=False, indent=2)
+                    backfill_state = state.get(group_id, {}).get('backfill', {})
+                    if crawl_type.value in backfill_state:
+                        del backfill_state[crawl_type.value]
+                        StateManager._write(state)
+        except Exception as e:
+            print(f"Failed to clear backfill cursor: {e}")
+    
+    @staticmethod
+    def clear_state(group_id: Optional[str] = None):
+        """
+        Clear state for a specific group or all groups
+        
+        Args:
+            group_id: Group ID to clear state for, None to clear all states
+        """
+        try:
+            with StateManager._locked():
+                if os.path.exists(LAST_CRAWLED_FILE):
+                    if group_id is None:
+                        os.remove(LAST_CRAWLED_FILE)
+                    else:
+                        with open(LAST_CRAWLED_FILE, 'r', encoding='utf-8') as f:
+                            state = json.load(f)
+                        if group_id in state:
+                            del state[group_id]
+                            StateManager._write(state)
         except Exception as e:
             print(f"Failed to clear state: {e}")
@@ -0,0 +1,49 @@
+"""
+Test settings: every store lives in a temporary directory and the crawler talks
+to the fake 知识星球 API of benchmarks/fake_zsxq_server.py
+"""
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+GROUP_ID = '1001'
+
+# config reads the environment on import, so this has to run before any src module is imported
+WORKDIR = tempfile.mkdtemp(prefix='zsxq_tests_')
+os.chdir(WORKDIR)
+os.environ.update({
+    'ZSXQ_COOKIE': 'test',
+    'TELEGRAM_BOT_TOKEN': 'test',
+    'TELEGRAM_CHAT_ID': 'test',
+    'ZSXQ_GROUPS': json.dumps({GROUP_ID: {'is_crawl_home': True, 'thread_ids': {}}}),
+    'TOPIC_CACHE_FILE': os.path.join(WORKDIR, 'topic_cache.db'),
+    'QUOTA_FILE': os.path.join(WORKDIR, 'api_quota.db'),
+    'DELIVERY_OUTBOX_FILE': os.path.join(WORKDIR, 'delivery_outbox.db'),
+    'TEMP_DIR': os.path.join(WORKDIR, 'downloads'),
+    'RATE_LIMIT_INITIAL_RATE': '1000',
+    'RATE_LIMIT_MAX_RATE': '1000',
+    'RATE_LIMIT_BURST': '100',
+    'RATE_LIMIT_MAX_RETRIES': '0',
+    'HTTP_MAX_RETRIES': '0',
+    'QUOTA_DAILY_LIMIT': '0',
+    'QUOTA_HOURLY_LIMIT': '0',
+})
+
+from fake_zsxq_server import FakeZsxqData, FakeZsxqServer  # noqa: E402
+
+
+@pytest.fixture
+def fake_server():
+    """A fake API with one group of 40 topics, every 5th of them a digest"""
+    from src.utils.topic_cache import TopicCache
+    TopicCache().clear()
+    server = FakeZsxqServer(FakeZsxqData([GROUP_ID], 40)).start()
+    yield server
+    server.stop()
@@ -0,0 +1,113 @@
+import os
+import signal
+import sqlite3
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from conftest import GROUP_ID
+import run_scheduler
+from config import GROUP_CONFIG_MANAGER
+from src.scheduler import crawl_scheduler
+from src.scheduler.crawl_scheduler import CrawlScheduler
+from src.utils import group_lease
+from src.utils.account_config import AccountConfigManager
+from src.utils.group_lease import GroupLeaseManager
+from src.utils.rate_limiter import AdaptiveRateLimiter
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(AdaptiveRateLimiter, '_limiters', {})
+    scheduler = CrawlScheduler(GROUP_CONFIG_MANAGER)
+    yield scheduler
+    scheduler._in_flight.clear()
+    scheduler.stop()
+
+
+@pytest.fixture
+def lease_file(tmp_path, monkeypatch):
+    """Share groups through a lease file, as replicas do"""
+    path = tmp_path / 'leases.db'
+    monkeypatch.setattr(group_lease, 'CRAWL_LEASE_FILE', str(path))
+    monkeypatch.setattr(GroupLeaseManager, '_instance', None)
+    monkeypatch.setattr(GroupLeaseManager, '_initialized', False)
+    return path
+
+
+def leases_of(path, owner):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT group_id FROM leases WHERE owner = ?", (owner,))]
+
+
+def stop_on_first_poll(scheduler, monkeypatch, interrupt):
+    """Make the scheduler loop call `interrupt` on its first pass, returning the leases it held then"""
+    held = []
+
+    def run_due_groups():
+        held.extend(scheduler.leases.owned_groups())
+        interrupt()
+
+    monkeypatch.setattr(scheduler, '_run_due_groups', run_due_groups)
+    return held
+
+
+def run_elsewhere(scheduler, *group_ids):
+    """Mark groups as being processed without running them"""
+    for group_id in group_ids:
+        scheduler._in_flight[group_id] = Future()
+
+
+def test_group_waits_while_its_account_is_backing_off(scheduler):
+    AdaptiveRateLimiter.for_key('default').on_throttle()
+    assert scheduler._account_delay(GROUP_ID) > 0
+
+
+def test_group_waits_while_its_account_runs_enough_groups(scheduler, monkeypatch):
+    monkeypatch.setattr(crawl_scheduler, 'CRAWL_ACCOUNT_CONCURRENCY', 2)
+    run_elsewhere(scheduler, '2001')
+    assert scheduler._account_delay(GROUP_ID) == 0
+    run_elsewhere(scheduler, '2002')
+    assert scheduler._account_delay(GROUP_ID) > 0
+
+
+def test_groups_of_other_accounts_do_not_count(scheduler, monkeypatch):
+    accounts = AccountConfigManager('{"other": {"cookie": "other", "groups": ["2001", "2002"]}}', 'test')
+    monkeypatch.setattr(crawl_scheduler, 'ACCOUNT_CONFIG_MANAGER', accounts)
+    monkeypatch.setattr(crawl_scheduler, 'CRAWL_ACCOUNT_CONCURRENCY', 1)
+    run_elsewhere(scheduler, '2001', '2002')
+    assert scheduler._account_delay(GROUP_ID) == 0
+
+
+def test_held_back_group_stays_scheduled(scheduler, monkeypatch):
+    monkeypatch.setattr(crawl_scheduler, 'CRAWL_ACCOUNT_CONCURRENCY', 1)
+    run_elsewhere(scheduler, '2001')
+    now = time.monotonic()
+    scheduler._schedule = [(now, GROUP_ID)]
+    scheduler._run_due_groups()
+    assert GROUP_ID not in scheduler._in_flight
+    assert len(scheduler._schedule) == 1
+    due, group_id = scheduler._schedule[0]
+    assert group_id == GROUP_ID and due > now
+
+
+def test_ctrl_c_releases_group_leases(lease_file, scheduler, monkeypatch):
+    def ctrl_c():
+        raise KeyboardInterrupt
+
+    held = stop_on_first_poll(scheduler, monkeypatch, ctrl_c)
+    scheduler.start()
+    assert held == [GROUP_ID]
+    assert leases_of(lease_file, scheduler.leases.instance_id) == []
+
+
+def test_sigterm_releases_group_leases(lease_file, scheduler, monkeypatch):
+    previous = signal.signal(signal.SIGTERM, run_scheduler.stop_on_sigterm)
+    try:
+        held = stop_on_first_poll(scheduler, monkeypatch, lambda: os.kill(os.getpid(), signal.SIGTERM))
+        scheduler.start()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    assert held == [GROUP_ID]
+    assert leases_of(lease_file, scheduler.leases.instance_id) == []
@@ -0,0 +1,45 @@
+import gzip
+
+from src.utils.response_journal import ResponseJournal
+
+
+def listing(topic_id):
+    return {'succeeded': True, 'resp_data': {'topics': [{'topic_id': topic_id, 'text': f'topic {topic_id} ' * 20}]}}
+
+
+def topic_ids(journal):
+    return [record['data']['resp_data']['topics'][0]['topic_id'] for record in journal.iter_records()]
+
+
+def tear_record(journal, topic_id):
+    """Cut the record of `topic_id` in half, as a crash mid-write would"""
+    segment, offset, length, _ = journal._index[str(topic_id)]
+    path = journal._segment_path(segment)
+    path.write_bytes(path.read_bytes()[:offset + length // 2])
+
+
+def test_reopened_journal_does_not_append_after_torn_record(tmp_path):
+    journal = ResponseJournal('1001', journal_dir=tmp_path)
+    journal.record('listing', 'url', None, listing(1))
+    journal.record('listing', 'url', None, listing(2))
+    tear_record(journal, 2)
+
+    reopened = ResponseJournal('1001', journal_dir=tmp_path)
+    reopened.record('listing', 'url', None, listing(3))
+
+    assert topic_ids(reopened) == [1, 3]
+    assert reopened.lookup(3) == listing(3)['resp_data']['topics'][0]
+
+
+def test_replay_skips_damaged_member_and_continues(tmp_path):
+    journal = ResponseJournal('1001', journal_dir=tmp_path)
+    journal.record('listing', 'url', None, listing(1))
+    tear_record(journal, 1)
+    # A record appended after the torn bytes, as journals written before segments were per-process did
+    with open(journal._segment_path(journal._segment), 'ab') as f:
+        f.write(gzip.compress(b'{"kind": "listing", "data": {}}\n'))
+
+    reopened = ResponseJournal('1001', journal_dir=tmp_path)
+    reopened.record('listing', 'url', None, listing(2))
+
+    assert topic_ids(reopened) == [2]
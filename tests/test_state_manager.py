@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import state_manager
+from conftest import GROUP_ID
+from state_manager import CrawlType, StateManager
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    path = tmp_path / 'last_crawled.json'
+    monkeypatch.setattr(state_manager, 'LAST_CRAWLED_FILE', str(path))
+    StateManager.save_state(GROUP_ID, CrawlType.HOME, {'last_topic_id': '1'})
+    StateManager.save_backfill_cursor(GROUP_ID, CrawlType.HOME, {'end_time': '2024-01-01'})
+    StateManager.save_state('2001', CrawlType.HOME, {'last_topic_id': '2'})
+    return path
+
+
+@pytest.fixture
+def crash_mid_write(monkeypatch):
+    """Make the next state write die after part of the file was written"""
+    def dump(obj, f, **kwargs):
+        f.write('{"')
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(state_manager.json, 'dump', dump)
+
+
+def test_crash_while_clearing_backfill_cursor_keeps_the_state(state_file, crash_mid_write):
+    before = state_file.read_text(encoding='utf-8')
+    StateManager.clear_backfill_cursor(GROUP_ID, CrawlType.HOME)
+    assert state_file.read_text(encoding='utf-8') == before
+
+
+def test_crash_while_clearing_group_state_keeps_the_state(state_file, crash_mid_write):
+    before = state_file.read_text(encoding='utf-8')
+    StateManager.clear_state(GROUP_ID)
+    assert state_file.read_text(encoding='utf-8') == before
+
+
+def test_clear_state_keeps_other_groups(state_file):
+    StateManager.clear_backfill_cursor(GROUP_ID, CrawlType.HOME)
+    assert StateManager.get_backfill_cursor(GROUP_ID, CrawlType.HOME) is None
+    StateManager.clear_state(GROUP_ID)
+    assert list(json.loads(state_file.read_text(encoding='utf-8'))) == ['2001']
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from conftest import GROUP_ID
+from src.crawlers.async_zsxq_crawler import AsyncZsxqCrawler
+from src.crawlers.zsxq_crawler import CrawlIncompleteError, ZsxqCrawler
+from src.utils.http_client import HttpClient
+
+
+def crawler_for(server, crawler_class=ZsxqCrawler):
+    crawler = crawler_class(GROUP_ID)
+    crawler.base_url = server.base_url
+    return crawler
+
+
+def fail_detail(server, response):
+    """Answer the detail request of the newest digest topic with `response`, returns its ID"""
+    topics, _ = server.data.digest_page(GROUP_ID, 30, 0)
+    topic_id = topics[0]['topic_id']
+    route = server.route
+    server.route = lambda path: response if path.startswith(f'/v2/topics/{topic_id}/info') else route(path)
+    return topic_id
+
+
+def stream_async(crawler):
+    async def collect():
+        try:
+            return [topic async for topic in crawler.stream_digest_topics()]
+        finally:
+            await HttpClient.close_async_session()
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize('response', [
+    (404, {'succeeded': False, 'code': 404}),
+    (200, {'succeeded': False, 'code': 1030}),
+])
+def test_digest_stream_skips_topic_without_detail(fake_server, response):
+    missing = fail_detail(fake_server, response)
+    topics = list(crawler_for(fake_server).stream_digest_topics())
+    assert len(topics) == 7
+    assert missing not in {topic.topic_id for topic in topics}
+
+
+def test_async_digest_stream_skips_topic_without_detail(fake_server):
+    missing = fail_detail(fake_server, (404, {'succeeded': False, 'code': 404}))
+    topics = stream_async(crawler_for(fake_server, AsyncZsxqCrawler))
+    assert len(topics) == 7
+    assert missing not in {topic.topic_id for topic in topics}
+
+
+def test_digest_stream_is_incomplete_on_transient_detail_error(fake_server):
+    fail_detail(fake_server, (500, {'succeeded': False, 'code': 500}))
+    with pytest.raises(CrawlIncompleteError):
+        list(crawler_for(fake_server).stream_digest_topics())
+
+
+def test_async_digest_stream_is_incomplete_on_transient_detail_error(fake_server):
+    fail_detail(fake_server, (500, {'succeeded': False, 'code': 500}))
+    with pytest.raises(CrawlIncompleteError):
+        stream_async(crawler_for(fake_server, AsyncZsxqCrawler))